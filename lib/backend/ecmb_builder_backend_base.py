@@ -0,0 +1,121 @@
+"""
+ File: ecmb_builder_backend_base.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import io
+import numpy
+from abc import ABC, abstractmethod
+
+
+class ecmbBuilderBackendBase(ABC):
+
+    # the images are only handled by the backend, the resize-methods just pass them on
+    _name = None
+
+    def get_name(self):
+        return self._name
+    name: str = property(get_name)
+
+
+    @abstractmethod
+    def open(self, fp_image: str|io.BytesIO) -> object:
+        # the image isn't decoded until it's needed
+        pass
+
+
+    @abstractmethod
+    def probe(self, image: object) -> dict:
+        # the header-facts like ecmbBuilderPageStore.read_header()
+        pass
+
+
+    @abstractmethod
+    def get_size(self, image: object) -> tuple[int, int]:
+        pass
+
+
+    @abstractmethod
+    def get_mode(self, image: object) -> str:
+        pass
+
+
+    @abstractmethod
+    def has_alpha(self, image: object) -> bool:
+        pass
+
+
+    @abstractmethod
+    def draft(self, image: object, size: tuple[int, int]) -> object:
+        # jpegs can be decoded with 1/2, 1/4 or 1/8 of their size, the draft is never smaller than the requested size
+        pass
+
+
+    @abstractmethod
+    def load(self, image: object) -> object:
+        pass
+
+
+    @abstractmethod
+    def crop(self, image: object, box: tuple[int, int, int, int]) -> object:
+        pass
+
+
+    @abstractmethod
+    def resize(self, image: object, size: tuple[int, int], resample: str, reducing_gap: float = None) -> object:
+        # resample is "lanczos", "bicubic", "bilinear" or "nearest"
+        pass
+
+
+    @abstractmethod
+    def to_grayscale(self, image: object) -> object:
+        pass
+
+
+    @abstractmethod
+    def normalize(self, image: object) -> tuple[object, list[str]]:
+        # sRGB without an icc-profile, 8 bit, without an opaque alpha-channel and without exif and xmp
+        # returns the image and the steps which were done ("icc", "depth", "alpha")
+        pass
+
+
+    @abstractmethod
+    def get_array(self, image: object, width: int, mode: str, nearest: bool = False) -> numpy.ndarray:
+        # a small copy for analysing the image, "L" or "RGB", averaged if not nearest
+        pass
+
+
+    @abstractmethod
+    def materialize(self, image: object) -> object:
+        # the image is read more than once, eg. for the halves of a double-page
+        pass
+
+
+    @abstractmethod
+    def encode_webp(self, image: object, quality: int, method: int, lossless: bool = False) -> io.BytesIO:
+        pass
+
+
+    @abstractmethod
+    def close(self, image: object) -> None:
+        pass
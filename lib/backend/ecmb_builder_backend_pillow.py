@@ -0,0 +1,170 @@
+"""
+ File: ecmb_builder_backend_pillow.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import io, hashlib
+import numpy
+from PIL import Image, ImageCms
+from .ecmb_builder_backend_base import ecmbBuilderBackendBase
+
+
+class ecmbBuilderBackendPillow(ecmbBuilderBackendBase):
+
+    _name = 'pillow'
+
+    _resample_filters = {
+        'lanczos': Image.Resampling.LANCZOS,
+        'bicubic': Image.Resampling.BICUBIC,
+        'bilinear': Image.Resampling.BILINEAR,
+        'nearest': Image.Resampling.NEAREST
+    }
+
+    # the keys of image.info with meta-data which isn't needed for the book, the webp-encoder doesn't write them anyway
+    _metadata_keys = ['exif', 'xmp', 'XML:com.adobe.xmp', 'icc_profile', 'photoshop', 'comment']
+
+    # the transforms are built once per profile, scans of a book mostly have the same one
+    _srgb_profile = None
+    _transforms = {}
+
+
+    def open(self, fp_image: str|io.BytesIO) -> Image:
+        return Image.open(fp_image)
+
+
+    def probe(self, image: Image) -> dict:
+        return {
+            'width': image.size[0],
+            'height': image.size[1],
+            'mode': image.mode,
+            'format': image.format,
+            'animated': bool(getattr(image, 'is_animated', False)),
+            'metadata': any([image.info.get(key) for key in self._metadata_keys])
+        }
+
+
+    def get_size(self, image: Image) -> tuple[int, int]:
+        return image.size
+
+
+    def get_mode(self, image: Image) -> str:
+        return image.mode
+
+
+    def has_alpha(self, image: Image) -> bool:
+        return 'A' in image.mode or 'transparency' in image.info
+
+
+    def draft(self, image: Image, size: tuple[int, int]) -> Image:
+        if image.format == 'JPEG':
+            image.draft(image.mode, size)
+        return image
+
+
+    def load(self, image: Image) -> Image:
+        image.load()
+        return image
+
+
+    def crop(self, image: Image, box: tuple[int, int, int, int]) -> Image:
+        return image.crop(box)
+
+
+    def resize(self, image: Image, size: tuple[int, int], resample: str, reducing_gap: float = None) -> Image:
+        # reducing_gap is shrinking the image with reduce() in integer-steps before the final resample
+        return image.resize(size, self._resample_filters[resample], reducing_gap=reducing_gap)
+
+
+    def to_grayscale(self, image: Image) -> Image:
+        return image.convert('L')
+
+
+    def normalize(self, image: Image) -> tuple[Image, list[str]]:
+        steps = []
+
+        icc_profile = image.info.get('icc_profile')
+        if icc_profile:
+            steps.append('icc')
+            if image.mode in ['RGB', 'RGBA', 'CMYK']:
+                image = self._to_srgb(image, icc_profile)
+
+        if image.mode in ['I', 'I;16', 'I;16L', 'I;16B', 'I;16N']:
+            # convert() would clip the values instead of scaling them
+            steps.append('depth')
+            pixels = numpy.asarray(image).astype(numpy.uint32) >> 8
+            image = Image.fromarray(pixels.clip(0, 255).astype(numpy.uint8), 'L')
+
+        if image.mode in ['RGBA', 'LA'] and image.getchannel('A').getextrema()[0] == 255:
+            steps.append('alpha')
+            image = image.convert(image.mode[:-1])
+
+        for key in self._metadata_keys:
+            image.info.pop(key, None)
+        return (image, steps)
+
+
+    def get_array(self, image: Image, width: int, mode: str, nearest: bool = False) -> numpy.ndarray:
+        factor = max(1, image.size[0] // width)
+        if nearest:
+            image_tmp = image.resize((max(1, image.size[0] // factor), max(1, image.size[1] // factor)), Image.Resampling.NEAREST)
+        else:
+            image_tmp = image if image.mode in ['L', 'RGB', 'RGBA'] else image.convert('RGB')
+            image_tmp = image_tmp.reduce(factor)
+        return numpy.asarray(image_tmp.convert(mode))
+
+
+    def materialize(self, image: Image) -> Image:
+        image.load()
+        return image
+
+
+    def encode_webp(self, image: Image, quality: int, method: int, lossless: bool = False) -> io.BytesIO:
+        fp_image = io.BytesIO()
+        image.save(fp_image, 'webp', quality = quality, method = method, lossless = lossless)
+        return fp_image
+
+
+    def close(self, image: Image) -> None:
+        image.close()
+
+
+    def _to_srgb(self, image: Image, icc_profile: bytes) -> Image:
+        # a profile which can't be read is only removed
+        output_mode = 'RGBA' if image.mode == 'RGBA' else 'RGB'
+        key = (hashlib.sha1(icc_profile).hexdigest(), image.mode)
+        try:
+            if key not in self._transforms:
+                if ecmbBuilderBackendPillow._srgb_profile == None:
+                    ecmbBuilderBackendPillow._srgb_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB'))
+                input_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+                # most scans are already sRGB, then the profile is only removed
+                if image.mode != 'CMYK' and ImageCms.getProfileDescription(input_profile).strip().lower().startswith('srgb'):
+                    self._transforms[key] = None
+                else:
+                    self._transforms[key] = ImageCms.buildTransform(input_profile, self._srgb_profile, image.mode, output_mode)
+            if self._transforms[key] == None:
+                return image
+            return ImageCms.applyTransform(image, self._transforms[key])
+        except (ImageCms.PyCMSError, OSError, ValueError):
+            self._transforms[key] = None
+            return image
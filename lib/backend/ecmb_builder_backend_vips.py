@@ -0,0 +1,236 @@
+"""
+ File: ecmb_builder_backend_vips.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import io
+import numpy
+from math import ceil
+from .ecmb_builder_backend_base import ecmbBuilderBackendBase
+from ..ecmblib.src.ecmblib import ecmbUtils
+
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+
+class ecmbBuilderVipsImage():
+
+    # the source is kept, so the loader can shrink while decoding (draft) and for analysing the image
+    _image = None
+    _source = None
+    _in_memory = None
+
+    def __init__(self, image: 'pyvips.Image', source: str|bytes, in_memory: bool = False):
+        self._image = image
+        self._source = source
+        self._in_memory = in_memory
+
+
+    def get_image(self):
+        return self._image
+    image: 'pyvips.Image' = property(get_image)
+
+    def get_source(self):
+        return self._source
+    source: str|bytes = property(get_source)
+
+    def get_in_memory(self):
+        return self._in_memory
+    in_memory: bool = property(get_in_memory)
+
+
+class ecmbBuilderBackendVips(ecmbBuilderBackendBase):
+
+    _name = 'vips'
+
+    _kernels = {
+        'lanczos': 'lanczos3',
+        'bicubic': 'cubic',
+        'bilinear': 'linear',
+        'nearest': 'nearest'
+    }
+
+    _formats = {
+        'jpegload': 'JPEG',
+        'pngload': 'PNG',
+        'webpload': 'WEBP',
+        'gifload': 'GIF'
+    }
+
+    _modes = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+
+    # the fields with meta-data which isn't needed for the book, webpsave would keep them
+    _metadata_fields = ['exif-data', 'xmp-data', 'iptc-data', 'icc-profile-data']
+
+    def __init__(self):
+        if pyvips == None:
+            ecmbUtils.raise_exception('the imaging-backend "vips" needs pyvips and libvips, please install them!')
+
+
+    def open(self, fp_image: str|io.BytesIO) -> ecmbBuilderVipsImage:
+        # sequential access streams the image through the pipeline in strips
+        source = fp_image if type(fp_image) == str else fp_image.getvalue()
+        return ecmbBuilderVipsImage(self._load(source), source)
+
+
+    def probe(self, image: ecmbBuilderVipsImage) -> dict:
+        loader = image.image.get('vips-loader') if image.image.get_typeof('vips-loader') else ''
+        pages = image.image.get('n-pages') if image.image.get_typeof('n-pages') else 1
+        return {
+            'width': image.image.width,
+            'height': image.image.height,
+            'mode': self.get_mode(image),
+            'format': self._formats.get(loader.replace('_source', '').replace('_buffer', '')),
+            'animated': pages > 1,
+            'metadata': any([image.image.get_typeof(name) for name in self._metadata_fields])
+        }
+
+
+    def get_size(self, image: ecmbBuilderVipsImage) -> tuple[int, int]:
+        return (image.image.width, image.image.height)
+
+
+    def get_mode(self, image: ecmbBuilderVipsImage) -> str:
+        return self._modes.get(image.image.bands, 'RGB')
+
+
+    def has_alpha(self, image: ecmbBuilderVipsImage) -> bool:
+        return image.image.hasalpha()
+
+
+    def draft(self, image: ecmbBuilderVipsImage, size: tuple[int, int]) -> ecmbBuilderVipsImage:
+        # the jpeg-loader can shrink by 2, 4 or 8 while decoding
+        if self.probe(image)['format'] != 'JPEG':
+            return image
+        shrink = 1
+        while shrink < 8 and image.image.width // (shrink * 2) >= size[0] and image.image.height // (shrink * 2) >= size[1]:
+            shrink *= 2
+        if shrink == 1:
+            return image
+        return ecmbBuilderVipsImage(self._load(image.source, shrink=shrink), image.source)
+
+
+    def load(self, image: ecmbBuilderVipsImage) -> ecmbBuilderVipsImage:
+        # vips is demand-driven, the pixels are decoded when the result is written
+        return image
+
+
+    def crop(self, image: ecmbBuilderVipsImage, box: tuple[int, int, int, int]) -> ecmbBuilderVipsImage:
+        return ecmbBuilderVipsImage(image.image.crop(box[0], box[1], box[2] - box[0], box[3] - box[1]), image.source, image.in_memory)
+
+
+    def resize(self, image: ecmbBuilderVipsImage, size: tuple[int, int], resample: str, reducing_gap: float = None) -> ecmbBuilderVipsImage:
+        # vips shrinks in integer-steps by itself, reducing_gap is for pillow only
+        hscale = size[0] / image.image.width
+        vscale = size[1] / image.image.height
+        resized = image.image.resize(hscale, vscale=vscale, kernel=self._kernels[resample])
+        if resized.width != size[0] or resized.height != size[1]:
+            resized = resized.gravity('centre', size[0], size[1], extend='copy')
+        return ecmbBuilderVipsImage(resized, image.source, image.in_memory)
+
+
+    def to_grayscale(self, image: ecmbBuilderVipsImage) -> ecmbBuilderVipsImage:
+        return ecmbBuilderVipsImage(image.image.colourspace('b-w'), image.source, image.in_memory)
+
+
+    def normalize(self, image: ecmbBuilderVipsImage) -> tuple[ecmbBuilderVipsImage, list[str]]:
+        steps = []
+        image_tmp = image.image
+        fields = [name for name in self._metadata_fields if image_tmp.get_typeof(name)]
+
+        if image_tmp.format == 'ushort':
+            steps.append('depth')
+            image_tmp = image_tmp.colourspace('b-w' if image_tmp.bands <= 2 else 'srgb')
+
+        if image_tmp.get_typeof('icc-profile-data'):
+            # a profile which can't be read is only removed
+            steps.append('icc')
+            if image_tmp.bands >= 3:
+                try:
+                    image_tmp = image_tmp.icc_transform('srgb', embedded=True)
+                except pyvips.Error:
+                    pass
+
+        if image_tmp.hasalpha():
+            # the sequential pipeline can't be read twice, so the alpha-channel is checked on a copy from the source
+            alpha = image_tmp if image.in_memory else self._load(image.source)
+            if alpha[alpha.bands - 1].min() >= (65535 if alpha.format == 'ushort' else 255):
+                steps.append('alpha')
+                image_tmp = image_tmp.extract_band(0, n=image_tmp.bands - 1)
+
+        if fields:
+            image_tmp = image_tmp.copy()
+            for name in fields:
+                if image_tmp.get_typeof(name):
+                    image_tmp.remove(name)
+        return (ecmbBuilderVipsImage(image_tmp, image.source, image.in_memory), steps)
+
+
+    def get_array(self, image: ecmbBuilderVipsImage, width: int, mode: str, nearest: bool = False) -> numpy.ndarray:
+        # a sequential pipeline can only be read once, then it's loaded from the source again
+        # the geometry is the same, it's only drafted or converted to gray before it's in memory
+        factor = max(1, image.image.width // width)
+        image_tmp = image.image
+        if not image.in_memory:
+            image_tmp = self._load(image.source)
+            if image_tmp.width != image.image.width:
+                image_tmp = image_tmp.resize(image.image.width / image_tmp.width, vscale=image.image.height / image_tmp.height, kernel='linear')
+            if image.image.bands == 1:
+                image_tmp = image_tmp.colourspace('b-w')
+        if nearest:
+            image_tmp = image_tmp.subsample(factor, factor)
+        elif factor > 1:
+            # like pillow's reduce() the last incomplete block is kept
+            image_tmp = image_tmp.embed(0, 0, ceil(image_tmp.width / factor) * factor, ceil(image_tmp.height / factor) * factor, extend='copy')
+            image_tmp = image_tmp.shrink(factor, factor)
+        if image_tmp.hasalpha():
+            image_tmp = image_tmp.flatten(background=255)
+        image_tmp = image_tmp.colourspace('b-w' if mode == 'L' else 'srgb').cast('uchar')
+        pixels = image_tmp.numpy()
+        if mode == 'L' and pixels.ndim == 3:
+            pixels = pixels[:, :, 0]
+        return pixels
+
+
+    def materialize(self, image: ecmbBuilderVipsImage) -> ecmbBuilderVipsImage:
+        if image.in_memory:
+            return image
+        return ecmbBuilderVipsImage(image.image.copy_memory(), image.source, True)
+
+
+    def encode_webp(self, image: ecmbBuilderVipsImage, quality: int, method: int, lossless: bool = False) -> io.BytesIO:
+        # without keep="none" webpsave writes an exif-block with the resolution, keep needs libvips 8.15
+        options = {'keep': 'none'} if pyvips.at_least_libvips(8, 15) else {'strip': True}
+        return io.BytesIO(image.image.webpsave_buffer(Q=quality, effort=method, lossless=lossless, **options))
+
+
+    def close(self, image: ecmbBuilderVipsImage) -> None:
+        pass
+
+
+    def _load(self, source: str|bytes, **options) -> 'pyvips.Image':
+        if type(source) == str:
+            return pyvips.Image.new_from_file(source, access='sequential', **options)
+        return pyvips.Image.new_from_buffer(source, '', access='sequential', **options)
@@ -0,0 +1,327 @@
+"""
+ File: ecmb_benchmark.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, io, sys, json, platform, tempfile, shutil, subprocess, statistics
+import PIL
+from PIL import Image
+from time import perf_counter
+from datetime import datetime
+from .ecmb_builder_enums import *
+from .ecmb_builder_config import ecmbBuilderConfig
+from .ecmb_builder_executor import ecmbBuilderExecutor
+from .ecmb_builder import ecmbBuilder
+from .ecmb_benchmark_generator import ecmbBenchmarkGenerator
+from .resize.ecmb_builder_resize_base import ecmbBuilderResizeBase
+from .ecmblib.src.ecmblib import ecmbUtils, ecmbException
+
+
+class ecmbBenchmark():
+
+    _result_version = 1
+
+    # what an invoke-call imports before the task starts, every command is started in a new interpreter
+    _startup_commands = {
+        'tasks': 'import tasks',
+        'rename': 'import tasks; from lib.ecmb_renamer import ecmbRenamer; from lib.ecmb_builder_ecmblib import ecmbException; from lib.ecmb_builder_config import ecmbBuilderConfig; ecmbBuilderConfig()',
+        'build': 'import tasks; from lib.ecmb_builder import ecmbBuilder; from lib.ecmb_builder_config import ecmbBuilderConfig; ecmbBuilderConfig()'
+    }
+    _startup_runs = 5
+
+    # the imports of the rename- and split-tasks, without invoke, which may load yaml itself
+    _light_imports = {
+        'rename': 'from lib.ecmb_renamer import ecmbRenamer; from lib.ecmb_builder_ecmblib import ecmbException',
+        'splitvolumes': 'from lib.ecmb_renamer import ecmbRenamer; from lib.ecmb_builder_ecmblib import ecmbException'
+    }
+    _heavy_modules = ['PIL', 'lxml', 'yaml']
+
+    _builder_config = None
+    _work_dir = None
+    _results = None
+
+    def __init__(self):
+        self._builder_config = ecmbBuilderConfig()
+
+
+    def run(self, pages: int = 64, workers: int = 0, executor_type: EXECUTOR_TYPE = EXECUTOR_TYPE.PROCESS, save_file: str = None, compare_file: str = None) -> None:
+        pages = int(pages) if str(pages).isnumeric() else pages
+        ecmbUtils.validate_int(True, 'pages', pages, 1)
+
+        previous = self._load_results(compare_file) if compare_file else None
+
+        self._results = {
+            'version': self._result_version,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'pages': pages,
+            'executor': ecmbUtils.enum_value(executor_type),
+            'startup': {},
+            'methods': {},
+            'backends': {},
+            'scaling': {},
+            'build': None
+        }
+
+        self._run_startup()
+
+        self._work_dir = tempfile.mkdtemp(prefix='ecmb_benchmark_')
+        try:
+            # always the same seed, so runs with another number of pages have the same first pages
+            generator = ecmbBenchmarkGenerator()
+            image_paths = generator.generate_pages(os.path.join(self._work_dir, 'pages'), pages)
+            source_size = sum([os.path.getsize(image_path) for image_path in image_paths])
+
+            print(f'  {pages} synthetic pages ({source_size / 1024 / 1024:.1f} MB), executor "{self._results["executor"]}"', flush=True)
+            print('', flush=True)
+
+            self._run_methods(image_paths, source_size)
+            self._run_backends(image_paths, source_size)
+            self._run_scaling(image_paths, source_size, workers, executor_type)
+            self._run_build(generator, pages, workers, executor_type)
+        finally:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+
+        if save_file:
+            self._save_results(save_file)
+        if previous:
+            self._print_comparison(previous)
+
+
+    def _run_startup(self) -> None:
+        # the median of some runs, the first run also contains loading the files from disk
+        builder_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        print(f'  startup, median of {self._startup_runs} runs:', flush=True)
+        for label, command in self._startup_commands.items():
+            duration_list = []
+            for run_nr in range(self._startup_runs):
+                start = perf_counter()
+                result = subprocess.run([sys.executable, '-c', command], cwd=builder_path, capture_output=True, text=True)
+                duration_list.append(perf_counter() - start)
+                if result.returncode != 0:
+                    ecmbUtils.raise_exception(f'the startup-command "{command}" failed:\n' + result.stderr.strip())
+
+            duration = statistics.median(duration_list)
+            self._results['startup'][label] = duration
+            print(f'    {label:<20} {duration * 1000:8.1f}ms', flush=True)
+
+        # the imaging-libraries and yaml are loaded when they are used, not by the imports
+        for label, command in self._light_imports.items():
+            command += f'; import sys; loaded = [name for name in {self._heavy_modules!r} if name in sys.modules]; assert not loaded, "imported " + ", ".join(loaded)'
+            result = subprocess.run([sys.executable, '-c', command], cwd=builder_path, capture_output=True, text=True)
+            if result.returncode != 0:
+                ecmbUtils.raise_exception(f'the imports of "{label}" load heavy modules:\n' + result.stderr.strip())
+            print(f'    {label:<20} no {", ".join(self._heavy_modules)} imported', flush=True)
+        print('', flush=True)
+
+
+    def _run_methods(self, image_paths: list[str], source_size: int) -> None:
+        print('  resize-methods:', flush=True)
+        for method_name in self._builder_config.resize_methods.keys():
+            resize_method = self._load_resize_method(method_name)
+            start = perf_counter()
+            for image_path in image_paths:
+                resize_method.process(image_path)
+            result = self._get_result(len(image_paths), source_size, perf_counter() - start)
+
+            self._results['methods'][method_name] = result
+            self._print_result(method_name, result)
+        print('', flush=True)
+
+
+    def _run_backends(self, image_paths: list[str], source_size: int) -> None:
+        # the backends have to produce the same page-sizes as pillow, the pixels may differ slightly
+        print(f'  imaging-backends, resize-method "{self._builder_config.default_resize_method}":', flush=True)
+        reference = None
+        for backend_name in sorted(self._builder_config.imaging_backends.keys(), key=lambda name: name != 'pillow'):
+            try:
+                resize_method = self._load_resize_method(self._builder_config.default_resize_method, backend_name)
+            except ecmbException as e:
+                print(f'    {backend_name:<20} skipped: ' + str(e), flush=True)
+                continue
+
+            start = perf_counter()
+            image_list = [resize_method.process(image_path) for image_path in image_paths]
+            result = self._get_result(len(image_paths), source_size, perf_counter() - start)
+
+            size_list = [self._get_sizes(image) for image in image_list]
+            if reference == None:
+                reference = size_list
+            elif size_list != reference:
+                ecmbUtils.raise_exception(f'the page-sizes of the backend "{backend_name}" differ from the ones of "pillow"!')
+
+            self._results['backends'][backend_name] = result
+            self._print_result(backend_name, result)
+        print('', flush=True)
+
+
+    def _run_scaling(self, image_paths: list[str], source_size: int, workers: int, executor_type: EXECUTOR_TYPE) -> None:
+        resize_method = self._load_resize_method(self._builder_config.default_resize_method)
+        max_workers = ecmbBuilderExecutor(workers, executor_type).workers
+
+        print(f'  workers, resize-method "{self._builder_config.default_resize_method}":', flush=True)
+        reference = None
+        reference_time = None
+        worker_cnt = 1
+        while True:
+            with ecmbBuilderExecutor(worker_cnt, executor_type) as executor:
+                start = perf_counter()
+                image_list = [self._get_bytes(image) for image in executor.map(resize_method.process, image_paths)]
+                result = self._get_result(len(image_paths), source_size, perf_counter() - start)
+
+            if reference == None:
+                reference = image_list
+                reference_time = result['duration']
+            elif image_list != reference:
+                ecmbUtils.raise_exception(f'the result with {worker_cnt} workers differs from the sequential result!')
+
+            speedup = reference_time / result['duration']
+            self._results['scaling'][str(worker_cnt)] = result
+            self._print_result(str(worker_cnt), result, f'   speedup: {speedup:5.2f}x   efficiency: {speedup / worker_cnt * 100:5.1f}%')
+
+            if worker_cnt >= max_workers:
+                break
+            worker_cnt = min(worker_cnt * 2, max_workers)
+        print('', flush=True)
+
+
+    def _run_build(self, generator: ecmbBenchmarkGenerator, pages: int, workers: int, executor_type: EXECUTOR_TYPE) -> None:
+        # 2 volumes with 2 chapters each, the pages are split up to the chapters
+        chapter_pages = max(1, pages // 4)
+        book_dir = os.path.join(self._work_dir, 'book')
+        generator.generate_series(book_dir, 'ecmb Benchmark', 2, 2, chapter_pages)
+        source_size = sum([os.path.getsize(os.path.join(path, file_name)) for path, dirs, files in os.walk(book_dir) for file_name in files if file_name != 'book_config.json'])
+
+        print('  build:', flush=True)
+        builder = _ecmbBenchmarkBuilder(book_dir)
+        start = perf_counter()
+        builder.build(None, workers, executor_type, 1, True)
+        result = self._get_result(chapter_pages * 4, source_size, perf_counter() - start)
+
+        self._results['build'] = result
+        self._print_result('ecmbBuilder.build', result)
+        print('', flush=True)
+
+
+    def _get_result(self, pages: int, size: int, duration: float) -> dict:
+        return {
+            'duration': duration,
+            'pages_per_sec': pages / duration,
+            'mb_per_sec': size / 1024 / 1024 / duration
+        }
+
+
+    def _print_result(self, label: str, result: dict, suffix: str = '') -> None:
+        print(f'    {label:<20} {result["duration"]:8.2f}s   {result["pages_per_sec"]:8.2f} pages/s   {result["mb_per_sec"]:7.2f} MB/s' + suffix, flush=True)
+
+
+    def _save_results(self, file_name: str) -> None:
+        try:
+            with open(file_name, 'w') as f:
+                json.dump(self._results, f, indent=1)
+        except OSError as e:
+            ecmbUtils.raise_exception(f'failed to save the results to "{file_name}": ' + str(e))
+        print(f'  results saved to "{file_name}"', flush=True)
+        print('', flush=True)
+
+
+    def _load_results(self, file_name: str) -> dict:
+        try:
+            with open(file_name, 'r') as f:
+                results = json.load(f)
+        except (OSError, ValueError) as e:
+            ecmbUtils.raise_exception(f'failed to load the results from "{file_name}": ' + str(e))
+        if type(results) != dict or results.get('version') != self._result_version:
+            ecmbUtils.raise_exception(f'"{file_name}" contains no compatible benchmark-results!')
+        return results
+
+
+    def _print_comparison(self, previous: dict) -> None:
+        print(f'  compared to the run from {previous["date"]} ({previous["pages"]} pages, executor "{previous["executor"]}"):', flush=True)
+
+        for label, duration in self._results['startup'].items():
+            old_duration = previous.get('startup', {}).get(label)
+            if old_duration:
+                change = (duration / old_duration - 1) * 100
+                print(f'    {"startup " + label:<20} {old_duration * 1000:8.1f} -> {duration * 1000:8.1f} ms        {change:+6.1f}%', flush=True)
+
+        row_list = []
+        for method_name, result in self._results['methods'].items():
+            row_list.append((method_name, previous['methods'].get(method_name), result))
+        for backend_name, result in self._results['backends'].items():
+            row_list.append(('backend ' + backend_name, previous.get('backends', {}).get(backend_name), result))
+        for worker_cnt, result in self._results['scaling'].items():
+            row_list.append((worker_cnt + ' workers', previous['scaling'].get(worker_cnt), result))
+        row_list.append(('ecmbBuilder.build', previous.get('build'), self._results['build']))
+
+        for label, old_result, new_result in row_list:
+            if not old_result or not new_result:
+                continue
+            change = (new_result['pages_per_sec'] / old_result['pages_per_sec'] - 1) * 100
+            print(f'    {label:<20} {old_result["pages_per_sec"]:8.2f} -> {new_result["pages_per_sec"]:8.2f} pages/s   {change:+6.1f}%', flush=True)
+        print('', flush=True)
+
+
+    def _get_bytes(self, image: list[str|io.BytesIO]) -> list[bytes]:
+        result = []
+        for part in image:
+            if type(part) == str:
+                with open(part, 'rb') as f:
+                    result.append(f.read())
+            else:
+                result.append(part.getvalue())
+        return result
+
+
+    def _get_sizes(self, image: list[str|io.BytesIO]) -> list[tuple[int, int]]:
+        result = []
+        for part in self._get_bytes(image):
+            with Image.open(io.BytesIO(part)) as pillow_image:
+                result.append(pillow_image.size)
+        return result
+
+
+    def _load_resize_method(self, method_name: str, backend_name: str = None) -> ecmbBuilderResizeBase:
+        config = self._builder_config
+
+        clas = config.load_resize_method(method_name)
+        backend = config.load_imaging_backend(backend_name)
+
+        return clas(config.default_resize_width, config.default_resize_height, config.default_webp_compression, True, config.default_resize_profile, config.default_spread_mode, config.default_webp_profile, config.default_lineart_lossless, backend)
+
+
+
+class _ecmbBenchmarkBuilder(ecmbBuilder):
+    # builds the generated book from the temp-dir, without the cache and without touching the configured directories
+
+    def __init__(self, book_dir: str):
+        super().__init__(book_dir)
+        self._cache = None
+        self._show_progress = False
+
+
+    def _set_dirs(self, folder_name: str) -> None:
+        self._folder_name = folder_name
+        self._source_dir = folder_name + '\\'
+        self._output_dir = folder_name + '_output\\'
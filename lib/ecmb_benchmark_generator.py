@@ -0,0 +1,168 @@
+"""
+ File: ecmb_benchmark_generator.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, json, random
+from PIL import Image, ImageDraw
+from .ecmb_builder_enums import *
+from .ecmb_builder_config import ecmbBuilderConfig
+
+
+class ecmbBenchmarkGenerator():
+
+    _format_list = ['jpg', 'jpg', 'png', 'webp']
+
+    _seed = None
+    _width = None
+    _height = None
+
+    def __init__(self, seed: int = 0, width: int = 1800, height: int = 2400):
+        self._seed = seed
+        self._width = width
+        self._height = height
+
+
+    def generate_pages(self, target_dir: str, pages: int, start_nr: int = 0) -> list[str]:
+        os.makedirs(target_dir, exist_ok=True)
+        image_paths = []
+        for page_nr in range(start_nr, start_nr + pages):
+            page_type = self.get_page_type(page_nr)
+            file_format = self._format_list[page_nr % len(self._format_list)]
+            image_path = os.path.join(target_dir, f'img_{page_nr:06d}.{file_format}')
+            self.generate_page(image_path, page_type, page_nr)
+            image_paths.append(image_path)
+        return image_paths
+
+
+    def generate_series(self, target_dir: str, title: str, volumes: int, chapters: int, pages: int) -> None:
+        # a source-tree with volumes and chapters and an initialized book_config.json
+        builder_config = ecmbBuilderConfig()
+        book_config = {
+            'builder-config': {
+                'resize_method': builder_config.default_resize_method,
+                'resize_width': builder_config.default_resize_width,
+                'resize_height': builder_config.default_resize_height,
+                'webp_compression': builder_config.default_webp_compression,
+                'compress_all': builder_config._default_compress_all,
+                'resize_profile': builder_config.default_resize_profile,
+                'spread_mode': builder_config.default_spread_mode,
+                'webp_profile': builder_config.default_webp_profile,
+                'lineart_lossless': builder_config.default_lineart_lossless
+            },
+            'required': {
+                'type': builder_config.default_book_type,
+                'language': builder_config.default_book_language,
+                'title': title
+            },
+            'volumes': {}
+        }
+
+        page_nr = 0
+        for volume_nr in range(1, volumes + 1):
+            volume_name = f'volume_{volume_nr:03d}'
+            book_config['volumes'][volume_name] = {}
+            for chapter_nr in range(1, chapters + 1):
+                chapter_name = f'chapter_{chapter_nr:04d}'
+                self.generate_pages(os.path.join(target_dir, volume_name, chapter_name), pages, page_nr)
+                book_config['volumes'][volume_name][chapter_name] = {'label': f'Chapter {chapter_nr}', 'title': '', 'start_with': None}
+                page_nr += pages
+
+        with open(os.path.join(target_dir, 'book_config.json'), 'w') as f:
+            json.dump(book_config, f, indent=4)
+
+
+    def get_page_type(self, page_nr: int) -> PAGE_TYPE:
+        # every 10th page is a double-page, every 7th a scan with borders, every 4th a colour-page
+        if page_nr % 10 == 9:
+            return PAGE_TYPE.SPREAD
+        if page_nr % 7 == 6:
+            return PAGE_TYPE.BORDERED
+        if page_nr % 4 == 3:
+            return PAGE_TYPE.COLOUR
+        return PAGE_TYPE.LINEART
+
+
+    def generate_page(self, image_path: str, page_type: PAGE_TYPE, page_nr: int) -> None:
+        rnd = random.Random(self._seed * 1000003 + page_nr)
+        width = self._width * 2 if page_type == PAGE_TYPE.SPREAD else self._width
+
+        if page_type == PAGE_TYPE.COLOUR:
+            image = self._draw_colour(rnd, width, self._height)
+        else:
+            image = self._draw_lineart(rnd, width, self._height)
+
+        if page_type == PAGE_TYPE.BORDERED:
+            # a smaller page on a white scan with a few grey dots from the scanner
+            border_x, border_y = rnd.randrange(60, 240), rnd.randrange(30, 120)
+            scan = Image.new('L', (width, self._height), 255)
+            scan.paste(image.resize((width - border_x * 2, self._height - border_y * 2)), (border_x, border_y))
+            draw = ImageDraw.Draw(scan)
+            for i in range(rnd.randrange(0, 4)):
+                x, y = rnd.randrange(width), rnd.randrange(self._height)
+                draw.point((x, y), fill=rnd.randrange(180, 240))
+            image = scan
+
+        self._save(image, image_path)
+
+
+    def _draw_lineart(self, rnd: random.Random, width: int, height: int) -> Image.Image:
+        image = Image.new('L', (width, height), 255)
+        draw = ImageDraw.Draw(image)
+
+        # panels with screentone-like fills and ink-lines
+        rows = rnd.randrange(2, 5)
+        for row in range(rows):
+            top = int(height / rows * row) + 20
+            bottom = int(height / rows * (row + 1)) - 20
+            draw.rectangle((20, top, width - 20, bottom), outline=0, width=rnd.randrange(3, 7), fill=rnd.choice([255, 255, 230, 200]))
+            for i in range(rnd.randrange(20, 60)):
+                x, y = rnd.randrange(20, width - 20), rnd.randrange(top, bottom)
+                draw.line((x, y, x + rnd.randrange(-300, 300), y + rnd.randrange(-300, 300)), fill=rnd.randrange(0, 80), width=rnd.randrange(1, 5))
+            for i in range(rnd.randrange(2, 6)):
+                x, y = rnd.randrange(20, width - 20), rnd.randrange(top, bottom)
+                r = rnd.randrange(30, 150)
+                draw.ellipse((x - r, y - r // 2, x + r, y + r // 2), outline=0, width=3, fill=255)
+        return image
+
+
+    def _draw_colour(self, rnd: random.Random, width: int, height: int) -> Image.Image:
+        # a gradient as background, so the page isn't compressing too well
+        gradient = Image.linear_gradient('L').resize((width, height))
+        image = Image.merge('RGB', (gradient, gradient.transpose(Image.Transpose.ROTATE_180), Image.new('L', (width, height), rnd.randrange(256))))
+        draw = ImageDraw.Draw(image)
+        for i in range(rnd.randrange(40, 100)):
+            x, y = rnd.randrange(width), rnd.randrange(height)
+            color = (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256))
+            draw.rectangle((x, y, x + rnd.randrange(20, 400), y + rnd.randrange(20, 400)), outline=(0, 0, 0), width=rnd.randrange(1, 6), fill=color)
+        return image
+
+
+    def _save(self, image: Image.Image, image_path: str) -> None:
+        match os.path.splitext(image_path)[1]:
+            case '.png':
+                image.save(image_path, 'png')
+            case '.webp':
+                image.save(image_path, 'webp', quality=90)
+            case _:
+                image.convert('RGB').save(image_path, 'jpeg', quality=90)
@@ -23,25 +23,64 @@
  SOFTWARE.
 """
 
-import re, os, path, hashlib
+import re, os, io, path, socket, hashlib
 from tqdm import tqdm
+from functools import partial
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from .ecmb_builder_enums import *
-from .ecmb_builder_utils import ecmbBuilderUtils
 from .ecmb_builder_base import ecmbBuilderBase
+from .ecmb_builder_executor import ecmbBuilderExecutor
+from .ecmb_builder_cache import ecmbBuilderCache
+from .ecmb_builder_manifest import ecmbBuilderManifest
+from .ecmb_builder_book_reader import ecmbBuilderBookReader
+from .ecmb_builder_spill import ecmbBuilderSpill
+from .ecmb_builder_report import ecmbBuilderReport
+from .ecmb_builder_planner import ecmbBuilderPlanner
+from .ecmb_builder_watcher import ecmbBuilderWatcher
+from .ecmb_builder_shard import ecmbBuilderShard
+from .ecmb_builder_lock import ecmbBuilderLock
+from .ecmb_builder_checkpoint import ecmbBuilderCheckpoint
+from .ecmb_builder_dedupe import ecmbBuilderDedupe
+from .ecmb_builder_page_store import ecmbBuilderPageStore
+from .ecmb_builder_config import ecmbBuilderConfig
+from .ecmb_builder_book_config import ecmbBuilderBookConfig
 from .resize.ecmb_builder_resize_base import ecmbBuilderResizeBase
-from .ecmblib.src.ecmblib import ecmbBook, ecmbException
+from .ecmblib.src.ecmblib import ecmbBook, ecmbUtils, ecmbException, BOOK_TYPE
 
 
 class ecmbBuilder(ecmbBuilderBase):
+
+    _show_progress = True
+    _cache = None
+    _spill = None
+    _report = None
+    _trace = False
+    _config_load = None
+    _lock = None
+    _checkpoint = None
+    _resume = False
+    _backend = None
+
+
+    def __init__(self, folder_name: str, builder_config: ecmbBuilderConfig = None):
+        start = perf_counter()
+        super().__init__(folder_name, builder_config)
+        self._config_load = (start, perf_counter() - start)
+
+        if self._builder_config.cache_dir:
+            self._cache = ecmbBuilderCache(self._builder_config.cache_dir, self._builder_config.cache_max_size)
+
     
     def initialize(self, init_type: INIT_TYPE) -> None:
         if self._book_config.is_initialized:
             raise ecmbException('Book is allready initialized!')
         
         (chapter_folders, volume_folders) = self._read_folder_structure()        
+        self._page_store.remove_missing()
         for chapter in chapter_folders:
-            if len(self._get_image_list(chapter['path'] + chapter['name'])) == 0:
+            if len(self._get_page_list(chapter['path'] + chapter['name'])) == 0:
                 raise ecmbException('Chapter-folder "' + chapter['path'] + chapter['name'] + '" is empty!')
             
         self._book_config.init_config(init_type, chapter_folders, volume_folders)
@@ -49,77 +88,530 @@ class ecmbBuilder(ecmbBuilderBase):
         print('\033[1;32;40m  Open "' + self._source_dir + 'book_config.json" and add all the meta-data to your book!\x1b[0m\n')
 
 
-    def build(self, volumes: int|list[int]) -> None:
+    def build(self, volumes: int|list[int], workers: int = 1, executor_type: EXECUTOR_TYPE = EXECUTOR_TYPE.THREAD, parallel_volumes: int = 1, force: bool = False, trace: bool = False, dry_run: bool = False, samples: int = 3, shard: str = None, resume: bool = False, backend: str = None) -> None:
         if not self._book_config.is_initialized:
             raise ecmbException('Book is not initialized!')
         
+        if backend:
+            if not self._builder_config.is_imaging_backend(backend):
+                ecmbUtils.validate_in_list(True, 'backend', backend, list(self._builder_config.imaging_backends.keys()))
+            self._backend = backend
+
+        if dry_run:
+            # a dry-run doesn't write anything to the output_dir, the page-store is only read
+            self._page_store = ecmbBuilderPageStore(self._page_store.file_name, True)
+
         resize_method = self._load_resize_method()
+        self._trace = True if trace else False
+        self._resume = True if resume else False
+
+        volume_nr_list = self.get_volume_nr_list(volumes, ecmbBuilderShard(shard) if shard else None)
+        if len(volume_nr_list) == 0:
+            print('  nothing to build' + (f' in shard {shard}' if shard else '') + '\n', flush=True)
+            return
+
+        if dry_run:
+            self._plan_volumes(resize_method, volume_nr_list, workers, executor_type, samples)
+            return
         
         if self._book_config.chapter_list:
-            self._build_book(resize_method, '', self._book_config.chapter_list)
+            with ecmbBuilderExecutor(workers, executor_type) as executor:
+                result = self.build_volume(resize_method, executor, None, force)
+            if result.get('locked'):
+                print('  ' + result['file_name'] + ' is locked by another build\n', flush=True)
+            elif result['skipped']:
+                print('  ' + result['file_name'] + ' is up to date\n', flush=True)
+            self._print_stats(result['stats'])
+            self._cleanup_cache()
+            return
+
+        parallel_volumes = int(parallel_volumes) if str(parallel_volumes).isnumeric() else parallel_volumes
+        ecmbUtils.validate_int(True, 'parallel_volumes', parallel_volumes, 1, 64)
+
+        if parallel_volumes == 1 or len(volume_nr_list) == 1:
+            results = {}
+            with ecmbBuilderExecutor(workers, executor_type) as executor:
+                for volume_nr in volume_nr_list:
+                    try:
+                        results[volume_nr] = self.build_volume(resize_method, executor, volume_nr, force)
+                    except Exception as e:
+                        results[volume_nr] = self._get_error_result(volume_nr, e)
         else:
-            if volumes != None:
-                volumes = volumes if type(volumes) == list else volumes.split(',')
-                volumes = [e.strip() for e in volumes]
+            results = self._build_volumes_parallel(volume_nr_list, workers, executor_type, parallel_volumes, force)
 
-            volume_nr = 0
-            for volume_dir, chapter_list in self._book_config.volume_list.items():
-                volume_nr += 1
-                if volumes and str(volume_nr) not in volumes:
-                    continue
-                self._build_book(resize_method, volume_dir, chapter_list, volume_nr)
+        self._cleanup_cache()
+        self._print_volume_summary(results)
 
 
-    def _build_book(self, resize_method: ecmbBuilderResizeBase, volume_dir: str, chapter_list: list, volume_nr: int = None) -> None:
+    def get_volume_nr_list(self, volumes: int|list[int] = None, shard: ecmbBuilderShard = None) -> list[int]:
+        # a book without volumes has only one book with the volume_nr None
+        if self._book_config.chapter_list:
+            return [None] if not shard or shard.contains(self._folder_name) else []
+
+        if volumes != None:
+            volumes = volumes if type(volumes) == list else str(volumes).split(',')
+            volumes = [str(e).strip() for e in volumes]
+
+        volume_nr_list = []
+        volume_nr = 0
+        for volume_dir in self._book_config.volume_list.keys():
+            volume_nr += 1
+            if volumes and str(volume_nr) not in volumes:
+                continue
+            if shard and not shard.contains(self._folder_name, volume_nr):
+                continue
+            volume_nr_list.append(volume_nr)
+        return volume_nr_list
+
+
+    def get_page_count(self, volume_nr: int = None) -> int:
+        volume_dir, chapter_list = self._get_volume(volume_nr)
+        return len(self._get_input_list(volume_dir, chapter_list))
+
+
+    def watch(self, workers: int = 1, executor_type: EXECUTOR_TYPE = EXECUTOR_TYPE.THREAD, debounce: float = 2) -> None:
+        if not self._book_config.is_initialized:
+            raise ecmbException('Book is not initialized!')
+
+        watcher = ecmbBuilderWatcher(self._source_dir, debounce)
+
+        # the executor is kept open, so the worker-pool stays warm between the rebuilds
+        with ecmbBuilderExecutor(workers, executor_type) as executor:
+            watcher.start()
+            try:
+                self._rebuild(executor, None)
+                print(f'  watching "{self._source_dir}" ({watcher.watch_method}), press Ctrl+C to stop\n', flush=True)
+                while True:
+                    changes = watcher.wait_for_changes()
+                    self._rebuild(executor, changes)
+            except KeyboardInterrupt:
+                print('', flush=True)
+            finally:
+                watcher.stop()
+
+
+    def _rebuild(self, executor: ecmbBuilderExecutor, changes: set[str] = None) -> None:
+        # volumes which are not affected are skipped by the manifest anyway, but this saves the scan
+        self._reset_index()
+        if changes == None or self._source_dir + 'book_config.json' in changes:
+            try:
+                self._book_config = ecmbBuilderBookConfig(self._builder_config, self._source_dir)
+                if not self._book_config.is_initialized:
+                    raise ecmbException('Book is not initialized!')
+            except ecmbException as e:
+                print('\x1b[31;20m  ' + str(e) + '\x1b[0m\n', flush=True)
+                return
+            volume_nr_list = self.get_volume_nr_list()
+        else:
+            volume_nr_list = self._get_changed_volumes(changes)
+
+        if len(volume_nr_list) == 0:
+            return
+
+        if changes != None:
+            print('  ' + datetime.now().strftime('%H:%M:%S') + f' {len(changes)} changed file(s)', flush=True)
+
+        resize_method = self._load_resize_method()
+        results = {}
+        for volume_nr in volume_nr_list:
+            try:
+                results[volume_nr] = self.build_volume(resize_method, executor, volume_nr)
+            except Exception as e:
+                results[volume_nr] = self._get_error_result(volume_nr, e)
+
+        self._cleanup_cache()
+        try:
+            self._print_volume_summary(results)
+        except ecmbException as e:
+            print('\x1b[31;20m  ' + str(e) + '\x1b[0m\n', flush=True)
+
+
+    def _get_changed_volumes(self, changes: set[str]) -> list[int]:
+        if self._book_config.chapter_list:
+            return [None]
+
+        volume_nr_list = []
+        volume_nr = 0
+        for volume_dir in self._book_config.volume_list.keys():
+            volume_nr += 1
+            volume_path = self._source_dir + volume_dir
+            for file_path in changes:
+                if file_path == volume_path or file_path.startswith(volume_path + '\\'):
+                    volume_nr_list.append(volume_nr)
+                    break
+        return volume_nr_list
+
+
+    def _plan_volumes(self, resize_method: ecmbBuilderResizeBase, volume_nr_list: list[int], workers: int, executor_type: EXECUTOR_TYPE, samples: int) -> None:
+        # nothing is written, only a few pages per chapter are processed and the rest is extrapolated
+        planner = ecmbBuilderPlanner(resize_method, samples)
+        workers = ecmbBuilderExecutor(workers, executor_type).workers
+
+        total = {'pages': 0, 'split_pages': 0, 'sampled_pages': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_time': 0}
+        for volume_nr in tqdm(volume_nr_list, desc='  sampling', disable=not self._show_progress):
+            volume_dir, chapter_list = self._get_volume(volume_nr)
+            cover_list = [self._get_cover_path(volume_dir, True), self._get_cover_path(volume_dir, False)]
+            cover_list = [image_path for image_path in cover_list if image_path]
+            chapter_images = [[chapter['path'] + image['name'] for image in self._get_image_list(chapter['path'])] for chapter in chapter_list]
+
+            # the same page-budget as in the build
+            volume_resize_method = None
+            if self._book_config.volume_size:
+                volume_resize_method = resize_method.with_page_budget(self._get_page_budget(resize_method, self._get_input_list(volume_dir, chapter_list)))
+
+            result = planner.plan_volume(self._get_file_name(volume_nr), cover_list, chapter_images, volume_resize_method)
+            tqdm.write(f'  {result["file_name"]}: {result["pages"]} pages ({result["split_pages"]} double-pages, {result["sampled_pages"]} sampled), ' + 
+                       f'{result["bytes_in"] / 1024 / 1024:.1f} MB -> ~{result["bytes_out"] / 1024 / 1024:.1f} MB, ~{result["cpu_time"]:.1f}s CPU')
+            for key in total.keys():
+                total[key] += result[key]
+
+        print('', flush=True)
+        print(f'  total: {total["pages"]} pages ({total["split_pages"]} double-pages), {total["bytes_in"] / 1024 / 1024:.1f} MB -> ~{total["bytes_out"] / 1024 / 1024:.1f} MB', flush=True)
+        print(f'  estimated build-time: ~{total["cpu_time"]:.0f}s CPU, ~{total["cpu_time"] / workers:.0f}s with {workers} worker(s)', flush=True)
+        print('', flush=True)
+
+
+    def _get_volume(self, volume_nr: int = None) -> tuple[str, list]:
+        if volume_nr == None:
+            return ('', self._book_config.chapter_list)
+        volume_dir = list(self._book_config.volume_list.keys())[volume_nr - 1]
+        return (volume_dir, self._book_config.volume_list[volume_dir])
+
+
+    def build_volume(self, resize_method: ecmbBuilderResizeBase, executor: ecmbBuilderExecutor, volume_nr: int = None, force: bool = False) -> dict:
+        # other builds, eg. on other nodes with the same output_dir, are skipping a volume while it's locked
+        file_name = self._get_file_name(volume_nr)
+        self._lock = ecmbBuilderLock(self._output_dir + '__ecmb_lock\\' + file_name + '.lock')
+        if not self._lock.acquire():
+            return {'file_name': file_name, 'error': None, 'skipped': True, 'locked': True, 'meta_data_only': False, 'stats': {}}
+        try:
+            return self._build_volume(resize_method, executor, volume_nr, force)
+        finally:
+            self._lock.release()
+
+
+    def _build_volume(self, resize_method: ecmbBuilderResizeBase, executor: ecmbBuilderExecutor, volume_nr: int = None, force: bool = False) -> dict:
+        volume_dir, chapter_list = self._get_volume(volume_nr)
+
+        file_name = self._get_file_name(volume_nr)
+        self._report = ecmbBuilderReport(file_name)
+        self._report.add_stage('config_load', self._config_load[0], self._config_load[1])
+
+        # the source_dir is scanned once by the first volume, the other volumes are using the index
+        start = perf_counter()
+        input_list = self._get_input_list(volume_dir, chapter_list)
+        self._report.add_stage('scan', start)
+
+        start = perf_counter()
+        manifest = ecmbBuilderManifest(self._output_dir + '__ecmb_manifest\\' + file_name + '.json')
+        if self._book_config.volume_size:
+            resize_method = resize_method.with_page_budget(self._get_page_budget(resize_method, input_list))
+        settings = self._get_build_settings(resize_method, chapter_list, volume_nr)
+        manifest_state = MANIFEST_STATE.OUTDATED if force else manifest.get_state(self._output_dir + file_name, input_list, settings)
+        self._report.add_stage('manifest', start)
+
+        if manifest_state == MANIFEST_STATE.UP_TO_DATE:
+            return {'file_name': file_name, 'error': None, 'skipped': True, 'meta_data_only': False, 'stats': {}}
+
+        # if only the meta-data has changed, the already compressed images of the previous book are reused
+        previous_book = None
+        if manifest_state == MANIFEST_STATE.META_DATA:
+            try:
+                previous_book = ecmbBuilderBookReader(self._output_dir + file_name)
+                cover_cnt = (1 if previous_book.cover_front else 0) + (1 if previous_book.cover_rear else 0)
+                if len(previous_book.page_list) != sum([2 if self._is_split_page(resize_method, image_path) else 1 for image_path in input_list[cover_cnt:]]):
+                    previous_book.close()
+                    previous_book = None
+            except ecmbException:
+                previous_book = None
+
+        # the processed pages are saved per chapter, so an interrupted build can be resumed
+        # resume decides only if the checkpoint of an earlier build is used, otherwise it's removed
+        self._checkpoint = ecmbBuilderCheckpoint(self._output_dir + '__ecmb_checkpoint\\' + file_name + '\\', settings['content'])
+        if not self._resume or not self._checkpoint.load():
+            self._checkpoint.clear()
+
+        manifest.remove()
+        try:
+            self._build_book(resize_method, executor, volume_dir, chapter_list, volume_nr, previous_book)
+        finally:
+            if previous_book:
+                previous_book.close()
+        manifest.write(input_list, settings)
+        self._checkpoint.clear()
+
+        self._report.write(self._output_dir + '__ecmb_report\\' + file_name + '.json')
+        if self._trace:
+            self._report.write_trace(self._output_dir + '__ecmb_report\\' + file_name + '.trace.json')
+
+        return {'file_name': file_name, 'error': None, 'skipped': False, 'meta_data_only': previous_book != None, 'stats': self._report.get_totals()}
+
+
+    def _get_error_result(self, volume_nr: int, error: Exception) -> dict:
+        # eg. a broken image only fails its own volume, the others are built anyway
+        error = str(error) if isinstance(error, ecmbException) else type(error).__name__ + ': ' + str(error)
+        return {'file_name': self._get_file_name(volume_nr), 'error': error, 'skipped': False, 'meta_data_only': False, 'stats': None}
+
+
+    def _build_volumes_parallel(self, volume_nr_list: list[int], workers: int, executor_type: EXECUTOR_TYPE, parallel_volumes: int, force: bool) -> dict:
+        # every volume is built in its own process with its own ecmbBook, at most parallel_volumes at once
+        results = {}
+        with ProcessPoolExecutor(max_workers=min(parallel_volumes, len(volume_nr_list))) as pool:
+            futures = {}
+            for volume_nr in volume_nr_list:
+                future = pool.submit(ecmbBuilder._build_volume_process, self._folder_name, volume_nr, workers, executor_type, force, self._trace, self._resume, self._backend)
+                futures[future] = volume_nr
+
+            progress = tqdm(as_completed(futures), total=len(futures), desc='  build volumes')
+            for future in progress:
+                volume_nr = futures[future]
+                try:
+                    results[volume_nr] = future.result()
+                except Exception as e:
+                    results[volume_nr] = self._get_error_result(volume_nr, e)
+                progress.set_postfix_str(results[volume_nr]['file_name'])
+
+        print('', flush=True)
+        return results
+
+
+    @staticmethod
+    def _build_volume_process(folder_name: str, volume_nr: int, workers: int, executor_type: EXECUTOR_TYPE, force: bool, trace: bool, resume: bool, backend: str) -> dict:
+        builder = ecmbBuilder(folder_name)
+        builder._show_progress = False
+        builder._trace = trace
+        builder._resume = resume
+        builder._backend = backend
+        resize_method = builder._load_resize_method()
+        with ecmbBuilderExecutor(workers, executor_type) as executor:
+            return builder.build_volume(resize_method, executor, volume_nr, force)
+
+
+    def _print_volume_summary(self, results: dict) -> None:
+        failed = 0
+        total_stats = {}
+        for volume_nr in sorted(results.keys()):
+            result = results[volume_nr]
+            if result['error']:
+                failed += 1
+                msg = '\n'.join(['      ' + p for p in result['error'].split('\n')])
+                print('\x1b[31;20m  FAILED:  ' + result['file_name'] + '\n' + msg + '\x1b[0m', flush=True)
+            elif result.get('locked'):
+                print('  SKIPPED: ' + result['file_name'] + ' (locked by another build)', flush=True)
+            elif result['skipped']:
+                print('  SKIPPED: ' + result['file_name'] + ' (up to date)', flush=True)
+            else:
+                print('\033[1;32;40m  OK:      ' + result['file_name'] + (' (meta-data only)' if result['meta_data_only'] else '') + '\x1b[0m', flush=True)
+                for key in ['pages', 'cache_hits', 'cache_misses', 'passthrough', 'gray_pages', 'colour_pages', 'duplicates', 'near_duplicates', 'normalized_pages', 'normalize_bytes_saved', 'normalize_time_saved']:
+                    total_stats[key] = total_stats.get(key, 0) + result['stats'].get(key, 0)
+                for step, cnt in result['stats'].get('normalized', {}).items():
+                    total_stats.setdefault('normalized', {})
+                    total_stats['normalized'][step] = total_stats['normalized'].get(step, 0) + cnt
+        print('', flush=True)
+
+        self._print_stats(total_stats)
+
+        if failed:
+            raise ecmbException(f'{failed} of {len(results)} volumes failed!')
+
+
+    def _print_stats(self, stats: dict) -> None:
+        if stats.get('gray_pages') or stats.get('colour_pages'):
+            print(f'  pages: {stats.get("gray_pages", 0)} gray, {stats.get("colour_pages", 0)} colour', flush=True)
+            print('', flush=True)
+        if stats.get('passthrough'):
+            print(f'  passthrough: {stats["passthrough"]} of {stats["pages"]} pages were added without re-encoding', flush=True)
+            print('', flush=True)
+        if stats.get('normalized_pages'):
+            normalized = stats.get('normalized', {})
+            print(f'  normalized: {stats.get("normalized_pages", 0)} pages ({normalized.get("icc", 0)} icc-profile, {normalized.get("depth", 0)} 16 bit, {normalized.get("alpha", 0)} opaque alpha)', flush=True)
+            print(f'              {stats.get("normalize_bytes_saved", 0) / 1024:.1f} KB and {stats.get("normalize_time_saved", 0):.2f}s encode-time saved', flush=True)
+            print('', flush=True)
+        if stats.get('duplicates') or stats.get('near_duplicates'):
+            print(f'  duplicates: {stats.get("duplicates", 0)} pages were processed only once, {stats.get("near_duplicates", 0)} near-duplicates, see the report', flush=True)
+            print('', flush=True)
+        if self._cache:
+            print(f'  cache: {stats.get("cache_hits", 0)} hits, {stats.get("cache_misses", 0)} misses', flush=True)
+            print('', flush=True)
+
+
+    def _build_book(self, resize_method: ecmbBuilderResizeBase, executor: ecmbBuilderExecutor, volume_dir: str, chapter_list: list, volume_nr: int = None, previous_book: ecmbBuilderBookReader = None) -> None:
         config = self._book_config
 
-        file_name = re.sub(r'[^a-zA-Z0-9]+', ' ', config.book_title).strip()
-        file_name += f' Vol. {volume_nr}' if volume_nr != None else ''
-        file_name += '.ecmb'
+        file_name = self._get_file_name(volume_nr)
 
-        print('  ' + file_name, flush=True)
+        if self._show_progress:
+            print('  ' + file_name, flush=True)
 
-        book_uid = self._generate_book_uid()
+        book_uid = self._generate_book_uid(volume_nr)
         book = ecmbBook(config.book_type, config.book_language, book_uid, config.resize_width, config.resize_height)
 
-        self._add_meta_data(book, volume_nr)
-        self._set_cover(book, resize_method, volume_dir)
-        self._add_content(book, resize_method, chapter_list)
+        self._spill = ecmbBuilderSpill(self._builder_config.memory_budget)
+        try:
+            self._add_meta_data(book, volume_nr)
+
+            start = perf_counter()
+            self._set_cover(book, resize_method, volume_dir, previous_book)
+            self._report.add_stage('cover', start)
+
+            start = perf_counter()
+            self._add_content(book, resize_method, executor, chapter_list, previous_book)
+            self._report.add_stage('content', start)
+
+            # all pages of the previous book are read, it's overwritten by the new one
+            if previous_book:
+                previous_book.close()
+
+            if not os.path.exists(self._output_dir):
+                os.makedirs(self._output_dir, exist_ok=True)
+
+            start = perf_counter()
+            with self._lock.keep_alive():
+                self._write_book(book, file_name)
+            self._report.add_stage('write', start)
+        finally:
+            self._spill.cleanup()
+
+        if self._show_progress:
+            print('', flush=True)
+
+
+    def _write_book(self, book: ecmbBook, file_name: str) -> None:
+        # the book is written to a temp-file in the same directory and renamed at the end, so readers never see a partial *.ecmb
+        tmp_dir = self._output_dir + '__ecmb_tmp\\'
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_file = tmp_dir + socket.gethostname() + '_' + str(os.getpid()) + '_' + file_name
+        try:
+            book.write(tmp_file)
+            os.replace(tmp_file, self._output_dir + file_name)
+        except OSError as e:
+            ecmbUtils.raise_exception(f'failed to write "{file_name}": ' + str(e))
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+
+    def _get_file_name(self, volume_nr: int = None) -> str:
+        file_name = re.sub(r'[^a-zA-Z0-9]+', ' ', self._book_config.book_title).strip()
+        file_name += f' Vol. {volume_nr}' if volume_nr != None else ''
+        file_name += '.ecmb'
+        return file_name
+
 
-        if not os.path.exists(self._output_dir):
-            os.makedirs(self._output_dir)
+    def _get_input_list(self, volume_dir: str, chapter_list: list) -> list[str]:
+        input_list = [self._get_cover_path(volume_dir, True), self._get_cover_path(volume_dir, False)]
+        input_list = [image_path for image_path in input_list if image_path]
+        for chapter in chapter_list:
+            input_list += [chapter['path'] + image['name'] for image in self._get_image_list(chapter['path'])]
+        return input_list
 
-        book.write(self._output_dir + file_name)
 
-        print('', flush=True)
+    def _get_page_budget(self, resize_method: ecmbBuilderResizeBase, input_list: list[str]) -> int:
+        # the volume-size is shared by the pages by their output-size
+        units = 0
+        for image_path in input_list:
+            page = self._page_store.get_page(image_path)
+            units += resize_method.get_page_units(page['width'], page['height']) if page else 1
+        return round(self._book_config.volume_size * 1024 * 1024 / max(1, units))
+
 
+    def _get_build_settings(self, resize_method: ecmbBuilderResizeBase, chapter_list: list, volume_nr: int = None) -> dict:
+        # everything which goes into the book beside the images
+        config = self._book_config
+        return {
+            'content': {
+                'resize_method': resize_method.get_cache_key(),
+                'chapter_paths': [chapter['path'] for chapter in chapter_list],
+                # the order of the halves of a split double-page depends on it
+                'book_type': config.book_type
+            },
+            'book_language': config.book_language,
+            'book_title': config.book_title,
+            'volume_nr': volume_nr,
+            'meta_data': config.meta_data,
+            'chapter_list': chapter_list
+        }
+
+
+    def _get_cover_path(self, volume_dir: str, front: bool) -> str:
+        if front:
+            image_list = self._get_index().list_files(self._source_dir + volume_dir, None, r'^(f|front|cover_front)[.](jpg|jpeg|png|webp)$', 0)
+        else:
+            image_list = self._get_index().list_files(self._source_dir + volume_dir, None, r'^(r|rear|cover_rear)[.](jpg|jpeg|png|webp)$', 0)
+        return image_list[0]['path'] + image_list[0]['name'] if len(image_list) else None
 
-    def _set_cover(self, book: ecmbBook, resize_method: ecmbBuilderResizeBase, volume_dir: str) -> None:
-        volume_dir = self._source_dir + volume_dir
 
-        image_list = ecmbBuilderUtils.list_files(volume_dir, None, r'^(f|front|cover_front)[.](jpg|jpeg|png|webp)$', 0)
-        if len(image_list):
-            image_path = image_list[0]['path'] + image_list[0]['name']
-            image = resize_method.process(image_path)
+    def _set_cover(self, book: ecmbBook, resize_method: ecmbBuilderResizeBase, volume_dir: str, previous_book: ecmbBuilderBookReader = None) -> None:
+        image_path = self._get_cover_path(volume_dir, True)
+        if image_path:
+            image = [previous_book.cover_front] if previous_book else self._process_image(resize_method, image_path)
             book.content.set_cover_front(image[0])
 
-        image_list = ecmbBuilderUtils.list_files(volume_dir, None, r'^(r|rear|cover_rear)[.](jpg|jpeg|png|webp)$', 0)
-        if len(image_list):
-            image_path = image_list[0]['path'] + image_list[0]['name']
-            image = resize_method.process(image_path)
+        image_path = self._get_cover_path(volume_dir, False)
+        if image_path:
+            image = [previous_book.cover_rear] if previous_book else self._process_image(resize_method, image_path)
             book.content.set_cover_rear(image[0])
             
 
     
-    def _add_content(self, book: ecmbBook, resize_method: ecmbBuilderResizeBase, chapter_list: list) -> None:
-        for chapter in tqdm(chapter_list, desc='  add content'):
-            folder = book.content.add_folder(chapter['path'])
+    def _add_content(self, book: ecmbBook, resize_method: ecmbBuilderResizeBase, executor: ecmbBuilderExecutor, chapter_list: list, previous_book: ecmbBuilderBookReader = None) -> None:
+        chapter_images = []
+        for chapter in chapter_list:
             image_list = self._get_image_list(chapter['path'])
-            for image in image_list:
-                image_path = chapter['path'] + image['name']
-                image = resize_method.process(image_path)
+            chapter_images.append([chapter['path'] + image['name'] for image in image_list])
+
+        # finished chapters of an interrupted build are taken from the checkpoint, the others are saved unless checkpoints are switched off
+        checkpoint = self._checkpoint if self._builder_config.checkpoints and not previous_book else None
+        resumed_chapters = [None] * len(chapter_list)
+        if self._resume and not previous_book:
+            resumed_chapters = [self._checkpoint.get_chapter(chapter['path'], image_list) for chapter, image_list in zip(chapter_list, chapter_images)]
+
+        # the pages are processed by the executor, but the results are added in the original order
+        image_paths = [image_path for image_list in chapter_images for image_path in image_list]
+        duplicates = {}
+        if previous_book:
+            processed = ((image, ecmbBuilderReport.end_page(ecmbBuilderReport.start_page(image_path))) for image, image_path in zip(self._get_previous_pages(resize_method, previous_book, image_paths), image_paths))
+        else:
+            process_paths = [image_path for image_list, resumed in zip(chapter_images, resumed_chapters) if resumed == None for image_path in image_list]
+            with self._lock.keep_alive():
+                duplicates = self._find_duplicates(chapter_list, chapter_images, process_paths)
+            process_paths = [image_path for image_path in process_paths if image_path not in duplicates]
+            processed = executor.map(self._get_process_func(resize_method), process_paths)
+        # exact duplicates are processed only once, the result is kept until its last duplicate is added
+        exact_duplicates = dict(duplicates)
+        reuse_cnt = {}
+        for original_path in duplicates.values():
+            reuse_cnt[original_path] = reuse_cnt.get(original_path, 0) + 1
+        reused = {original_path: None for original_path in reuse_cnt.keys()}
+        progress = tqdm(total=len(image_paths), desc='  add content', disable=not self._show_progress)
+
+        # with spread_mode "split" a double-page is added as two single pages in reading-order
+        manga = self._book_config.book_type == BOOK_TYPE.MANGA.value
+        for chapter_nr, (chapter, image_list) in enumerate(zip(chapter_list, chapter_images)):
+            folder = book.content.add_folder(chapter['path'])
+            split_pages = []
+            resumed = resumed_chapters[chapter_nr]
+            for page_nr, image_path in enumerate(image_list):
+                if resumed:
+                    image = self._add_page_stats((resumed[page_nr], ecmbBuilderReport.end_page(ecmbBuilderReport.start_page(image_path))))
+                else:
+                    if image_path in duplicates:
+                        image = self._add_page_stats(self._get_duplicate(reused, reuse_cnt, duplicates, image_path))
+                    else:
+                        image = self._add_page_stats(next(processed))
+                        if image_path in reused:
+                            reused[image_path] = [part if type(part) == str else part.getvalue() for part in image]
+                    if checkpoint:
+                        checkpoint.add_page(chapter_nr, image_path, image)
+                image = self._spill.store(image)
+                progress.update()
+                self._lock.refresh()
                 if len(image) == 3:
                     folder.add_image(image[0], image[1], image[2], unique_id=image_path)
+                elif len(image) == 2:
+                    folder.add_image(image[1] if manga else image[0], unique_id=image_path)
+                    folder.add_image(image[0] if manga else image[1], unique_id=image_path + '#2')
+                    split_pages.append(image_path)
                 else:
                     folder.add_image(image[0], unique_id=image_path)
             
@@ -129,9 +621,123 @@ class ecmbBuilder(ecmbBuilderBase):
                 start_with = chapter.get('start_with').split('#')
                 target = chapter['path'] + start_with[0]
                 target_side = start_with[1] if len(start_with) == 2 else None
+                if target in split_pages:
+                    # the second half is an own page
+                    if target_side == ('left' if manga else 'right'):
+                        target += '#2'
+                    target_side = None
 
             book.navigation.add_chapter(chapter.get('label'), folder, target, target_side, chapter.get('title'))
 
+            if checkpoint and not resumed:
+                checkpoint.commit_chapter(chapter['path'], image_list)
+
+        progress.close()
+
+        if not previous_book:
+            with self._lock.keep_alive():
+                self._find_near_duplicates(chapter_list, chapter_images, exact_duplicates)
+
+
+    def _is_split_page(self, resize_method: ecmbBuilderResizeBase, image_path: str) -> bool:
+        # with spread_mode "split" a double-page is added to the book as two pages
+        if self._book_config.spread_mode != SPREAD_MODE.SPLIT.value:
+            return False
+        page = self._page_store.get_page(image_path)
+        return page != None and resize_method.is_double_page(page['width'], page['height'])
+
+
+    def _get_previous_pages(self, resize_method: ecmbBuilderResizeBase, previous_book: ecmbBuilderBookReader, image_paths: list[str]) -> iter:
+        # the halves of a split double-page are two pages of the previous book, they are joined again in the order of process()
+        # a page is only read when it's added, so the memory-budget applies to the previous book too
+        manga = self._book_config.book_type == BOOK_TYPE.MANGA.value
+        page_list = iter(previous_book.page_list)
+        for image_path in image_paths:
+            if self._is_split_page(resize_method, image_path):
+                first, second = next(page_list), next(page_list)
+                yield previous_book.read_page(second + first if manga else first + second)
+            else:
+                yield previous_book.read_page(next(page_list))
+
+
+    def _find_duplicates(self, chapter_list: list, chapter_images: list[list[str]], process_paths: list[str]) -> dict:
+        # exact duplicates are only processed once, they are found by the hash of the file before processing
+        start = perf_counter()
+        duplicates = ecmbBuilderDedupe(self._page_store).find_exact(process_paths)
+
+        locations = self._get_page_locations(chapter_list, chapter_images)
+        for image_path, original_path in duplicates.items():
+            self._report.add_duplicate(locations[image_path], locations[original_path], 0, True)
+
+        self._report.add_stage('dedupe', start)
+        return duplicates
+
+
+    def _find_near_duplicates(self, chapter_list: list, chapter_images: list[list[str]], duplicates: dict) -> None:
+        # near-duplicates are only reported, so they can be removed from the source
+        # the hashes are set by processing the pages, passthrough-pages and pages of a resumed chapter have none
+        start = perf_counter()
+        image_paths = [image_path for image_list in chapter_images for image_path in image_list]
+        page_list = [self._page_store.get_page(image_path) for image_path in image_paths]
+        hash_list = [page['dhash'] if page else None for page in page_list]
+        near_duplicates = ecmbBuilderDedupe(self._page_store).find_near(image_paths, hash_list, duplicates)
+
+        locations = self._get_page_locations(chapter_list, chapter_images)
+        for image_path, original_path, distance in near_duplicates:
+            self._report.add_duplicate(locations[image_path], locations[original_path], distance, False)
+
+        self._report.add_stage('dedupe', start)
+
+
+    def _get_page_locations(self, chapter_list: list, chapter_images: list[list[str]]) -> dict:
+        locations = {}
+        for chapter, image_list in zip(chapter_list, chapter_images):
+            for page_nr, image_path in enumerate(image_list):
+                locations[image_path] = {'path': image_path, 'chapter': chapter.get('label') if chapter.get('label') else chapter['path'], 'page': page_nr + 1}
+        return locations
+
+
+    def _get_duplicate(self, reused: dict, reuse_cnt: dict, duplicates: dict, image_path: str) -> tuple[list[str|io.BytesIO], dict]:
+        original_path = duplicates.pop(image_path)
+        image = [part if type(part) == str else io.BytesIO(part) for part in reused[original_path]]
+        reuse_cnt[original_path] -= 1
+        if reuse_cnt[original_path] == 0:
+            del reused[original_path]
+
+        page_stats = ecmbBuilderReport.start_page(image_path)
+        page_stats['duplicate_of'] = original_path
+        return (image, ecmbBuilderReport.end_page(page_stats))
+
+
+    def _process_image(self, resize_method: ecmbBuilderResizeBase, image_path: str) -> list[str|io.BytesIO]:
+        return self._add_page_stats(self._get_process_func(resize_method)(image_path))
+
+
+    def _get_process_func(self, resize_method: ecmbBuilderResizeBase) -> callable:
+        # has to be picklable for the process-executor, so no lambdas or closures here
+        return partial(ecmbBuilder._process_page, self._cache, resize_method)
+
+
+    @staticmethod
+    def _process_page(cache: ecmbBuilderCache, resize_method: ecmbBuilderResizeBase, image_path: str) -> tuple[list[str|io.BytesIO], dict]:
+        page_stats = ecmbBuilderReport.start_page(image_path)
+        if cache:
+            image = cache.process(resize_method, image_path, page_stats)
+        else:
+            image = resize_method.process(image_path, page_stats)
+        return (image, ecmbBuilderReport.end_page(page_stats))
+
+
+    def _add_page_stats(self, processed: tuple[list[str|io.BytesIO], dict]) -> list[str|io.BytesIO]:
+        image, page_stats = processed
+        self._report.add_page(page_stats)
+        return image
+
+
+    def _cleanup_cache(self) -> None:
+        if self._cache:
+            self._cache.cleanup()
+
 
     def _add_meta_data(self, book: ecmbBook, volume_nr: int = None) -> None:
         config = self._book_config
@@ -198,10 +804,10 @@ class ecmbBuilder(ecmbBuilderBase):
                     book.based_on.add_author(author.get('name'), author.get('role'), href = author.get('href'))
 
 
-    def _generate_book_uid(self) -> str:
+    def _generate_book_uid(self, volume_nr: int = None) -> str:
         config = self._book_config
 
-        hash = config.book_title + str(datetime.now())
+        hash = config.book_title + str(volume_nr) + str(datetime.now())
 
         if type(config.meta_data.get('publisher')) == dict and config.meta_data['publisher'].get('name'):
             prefix = str(config.meta_data['publisher'].get('name'))
@@ -215,10 +821,10 @@ class ecmbBuilder(ecmbBuilderBase):
     def _load_resize_method(self) -> ecmbBuilderResizeBase:
         config = self._book_config
 
-        resize_methods = self._builder_config.resize_methods
-        resize_method = resize_methods[config.resize_method]
-
-        mod = __import__(resize_method[0], globals(), locals(), [resize_method[1]], 0)
-        clas = getattr(mod, resize_method[1])
+        clas = self._builder_config.load_resize_method(config.resize_method)
+        # the backend of the build overrides the one of the builder-config
+        backend = self._builder_config.load_imaging_backend(self._backend)
 
-        return clas(config.resize_width, config.resize_height, config.webp_compression, config.compress_all)
+        resize_method = clas(config.resize_width, config.resize_height, config.webp_compression, config.compress_all, config.resize_profile, config.spread_mode, config.webp_profile, config.lineart_lossless, backend)
+        resize_method.set_page_store(self._page_store)
+        return resize_method
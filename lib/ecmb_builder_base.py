@@ -24,13 +24,11 @@
 """
 
 import re, os, path, hashlib
-from tqdm import tqdm
-from datetime import datetime
-from .ecmb_builder_utils import ecmbBuilderUtils
+from .ecmb_builder_index import ecmbBuilderIndex
 from .ecmb_builder_config import ecmbBuilderConfig
 from .ecmb_builder_book_config import ecmbBuilderBookConfig
-from .resize.ecmb_builder_resize_base import ecmbBuilderResizeBase
-from .ecmblib.src.ecmblib import ecmbBook, ecmbException
+from .ecmb_builder_page_store import ecmbBuilderPageStore
+from .ecmb_builder_ecmblib import ecmbException
 
 
 class ecmbBuilderBase():
@@ -41,16 +39,32 @@ class ecmbBuilderBase():
     _folder_name = None
     _source_dir = None
     _output_dir = None
+    _page_store = None
+    _index = None
 
 
-    def __init__(self, folder_name:str):
-        self._builder_config = ecmbBuilderConfig()
+    def __init__(self, folder_name:str, builder_config: ecmbBuilderConfig = None):
+        self._builder_config = builder_config if builder_config else ecmbBuilderConfig()
         self._set_dirs(folder_name)
         self._book_config = ecmbBuilderBookConfig(self._builder_config, self._source_dir)
+        # the page-store is kept in the output-dir, so watching the source-dir isn't triggered by it
+        # the folder-name can be a path, eg. of the benchmark, so it's made a valid file-name
+        self._page_store = ecmbBuilderPageStore(self._output_dir + '__ecmb_pages\\' + re.sub(r'[\\/:*?"<>|]+', '_', self._folder_name).strip('_ .') + '.db')
+
+
+    def _get_index(self) -> ecmbBuilderIndex:
+        # the series is read once, the volumes and chapters have only 2 levels and the images are in the chapters
+        if self._index == None:
+            self._index = ecmbBuilderIndex(self._source_dir, 2)
+        return self._index
+
+
+    def _reset_index(self) -> None:
+        self._index = None
 
 
     def _read_folder_structure(self) -> None:
-        folder_list = ecmbBuilderUtils.list_dirs(self._source_dir, r'^(?!__).+$', 2)
+        folder_list = self._get_index().list_dirs(self._source_dir, r'^(?!__).+$', 2)
         level0_folders = []
         level1_folders = []
         for folder in folder_list:
@@ -78,7 +92,14 @@ class ecmbBuilderBase():
         
     
     def _get_image_list(self, path: str) -> list:
-        return ecmbBuilderUtils.list_files(path, None, r'^(?!__).+[.](jpg|jpeg|png|webp)$', 0)
+        return self._get_index().list_files(path, None, r'^(?!__).+[.](jpg|jpeg|png|webp)$', 0)
+
+
+    def _get_page_list(self, path: str) -> list[dict]:
+        # the facts of all readable images of the folder
+        path = path if path[-1] in ['/', '\\'] else path + '\\'
+        page_list = [self._page_store.get_page(path + image['name']) for image in self._get_image_list(path)]
+        return [page for page in page_list if page != None]
 
 
     def _set_dirs(self, folder_name: str) -> None:
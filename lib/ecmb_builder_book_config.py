@@ -26,7 +26,7 @@
 import re, os, json
 from .ecmb_builder_enums import *
 from .ecmb_builder_config import ecmbBuilderConfig
-from .ecmblib.src.ecmblib import ecmbUtils, ecmbException, BOOK_TYPE, BASED_ON_TYPE, CONTENT_WARNING, AUTHOR_ROLE, EDITOR_ROLE
+from .ecmb_builder_ecmblib import ecmbUtils, ecmbException, BOOK_TYPE, BASED_ON_TYPE, CONTENT_WARNING, AUTHOR_ROLE, EDITOR_ROLE
 
 
 class ecmbBuilderBookConfig():
@@ -40,6 +40,11 @@ class ecmbBuilderBookConfig():
     _resize_method = None
     _webp_compression = None
     _compress_all = None
+    _resize_profile = None
+    _spread_mode = None
+    _webp_profile = None
+    _lineart_lossless = None
+    _volume_size = None
 
     _book_type = None
     _resize_width = None
@@ -76,6 +81,26 @@ class ecmbBuilderBookConfig():
         return self._compress_all
     compress_all: bool = property(get_compress_all) 
 
+    def get_resize_profile(self):
+        return self._resize_profile
+    resize_profile: str = property(get_resize_profile) 
+
+    def get_spread_mode(self):
+        return self._spread_mode
+    spread_mode: str = property(get_spread_mode) 
+
+    def get_webp_profile(self):
+        return self._webp_profile
+    webp_profile: str = property(get_webp_profile) 
+
+    def get_lineart_lossless(self):
+        return self._lineart_lossless
+    lineart_lossless: bool = property(get_lineart_lossless) 
+
+    def get_volume_size(self):
+        return self._volume_size
+    volume_size: int = property(get_volume_size) 
+
     def get_book_type(self):
         return self._book_type
     book_type: str = property(get_book_type) 
@@ -122,10 +147,19 @@ class ecmbBuilderBookConfig():
                 ecmbUtils.raise_exception('Invalid "book_config.json"!')
 
         try:
-            ecmbUtils.validate_in_list(True, 'builder-config -> resize_method', config['builder-config'].get('resize_method'), list(self._builder_config.resize_methods.keys()))
+            if not self._builder_config.is_resize_method(config['builder-config'].get('resize_method')):
+                ecmbUtils.validate_in_list(True, 'builder-config -> resize_method', config['builder-config'].get('resize_method'), list(self._builder_config.resize_methods.keys()))
             ecmbUtils.validate_int(True, 'builder-config -> resize_width', config['builder-config'].get('resize_width'), 100, 1800)
             ecmbUtils.validate_int(True, 'builder-config -> resize_height', config['builder-config'].get('resize_height'), 100, 2400)
             ecmbUtils.validate_int(True, 'builder-config -> webp_compression', config['builder-config'].get('webp_compression'), 0, 100)
+            if config['builder-config'].get('resize_profile') != None:
+                ecmbUtils.validate_enum(True, 'builder-config -> resize_profile', config['builder-config'].get('resize_profile'), RESIZE_PROFILE)
+            if config['builder-config'].get('spread_mode') != None:
+                ecmbUtils.validate_enum(True, 'builder-config -> spread_mode', config['builder-config'].get('spread_mode'), SPREAD_MODE)
+            if config['builder-config'].get('webp_profile') != None:
+                ecmbUtils.validate_enum(True, 'builder-config -> webp_profile', config['builder-config'].get('webp_profile'), WEBP_PROFILE)
+            if config['builder-config'].get('volume_size') != None:
+                ecmbUtils.validate_int(True, 'builder-config -> volume_size', config['builder-config'].get('volume_size'), 1)
             ecmbUtils.validate_enum(True, 'required -> type', config['required'].get('type'), BOOK_TYPE)
             ecmbUtils.validate_regex(True, 'required -> language', config['required'].get('language'), r'^[a-z]{2}$')
             ecmbUtils.validate_not_empty_str(True, 'required -> title', config['required'].get('title'))
@@ -175,6 +209,12 @@ class ecmbBuilderBookConfig():
         self._compress_all = True if config['builder-config'].get('compress_all') else False
 
         self._resize_method = config['builder-config'].get('resize_method') 
+        self._resize_profile = config['builder-config'].get('resize_profile') if config['builder-config'].get('resize_profile') else self._builder_config.default_resize_profile
+        self._spread_mode = config['builder-config'].get('spread_mode') if config['builder-config'].get('spread_mode') else self._builder_config.default_spread_mode
+        self._webp_profile = config['builder-config'].get('webp_profile') if config['builder-config'].get('webp_profile') else self._builder_config.default_webp_profile
+        lineart_lossless = config['builder-config'].get('lineart_lossless')
+        self._lineart_lossless = (True if lineart_lossless else False) if lineart_lossless != None else self._builder_config.default_lineart_lossless
+        self._volume_size = config['builder-config'].get('volume_size')
         self._resize_width = config['builder-config'].get('resize_width')
         self._resize_height = config['builder-config'].get('resize_height')
         self._webp_compression = config['builder-config'].get('webp_compression')
@@ -242,7 +282,12 @@ class ecmbBuilderBookConfig():
                 'resize_width': self._builder_config._default_resize_width,
                 'resize_height': self._builder_config._default_resize_height,
                 'webp_compression': self._builder_config._default_webp_compression,
-                'compress_all': self._builder_config._default_compress_all
+                'compress_all': self._builder_config._default_compress_all,
+                'resize_profile': self._builder_config.default_resize_profile,
+                'spread_mode': self._builder_config.default_spread_mode,
+                'webp_profile': self._builder_config.default_webp_profile,
+                'lineart_lossless': self._builder_config.default_lineart_lossless,
+                'volume_size': None
             },
             'required': {
                 'type': self._builder_config._default_book_type,
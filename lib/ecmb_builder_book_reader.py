@@ -0,0 +1,111 @@
+"""
+ File: ecmb_builder_book_reader.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import io, zipfile
+from xml.etree import ElementTree
+from .ecmblib.src.ecmblib import ecmbUtils
+
+
+class ecmbBuilderBookReader():
+
+    _file_name = None
+    _source_file = None
+    _cover_front = None
+    _cover_rear = None
+    _page_list = None
+
+    def __init__(self, file_name: str):
+        # the book stays open and the pages are read one by one, so they can be spilled like the processed pages
+        # the new book is written to a temp-file, the reader only has to be closed before it's renamed
+        self._file_name = file_name
+        try:
+            self._source_file = zipfile.ZipFile(file_name, 'r')
+            root = ElementTree.fromstring(self._source_file.read('ecmb.xml'))
+            content = None
+            for child in root:
+                if self._get_tag(child) == 'content':
+                    content = child
+            if content == None:
+                ecmbUtils.raise_exception(f'"{file_name}" has no content!')
+
+            if content.get('cover_front'):
+                self._cover_front = io.BytesIO(self._source_file.read(content.get('cover_front')))
+            if content.get('cover_rear'):
+                self._cover_rear = io.BytesIO(self._source_file.read(content.get('cover_rear')))
+
+            self._page_list = []
+            self._read_folder(content, 'content')
+        except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+            self.close()
+            ecmbUtils.raise_exception(f'failed to read "{file_name}": ' + str(e))
+        except:
+            self.close()
+            raise
+
+
+    def get_cover_front(self):
+        return self._cover_front
+    cover_front: io.BytesIO = property(get_cover_front)
+
+    def get_cover_rear(self):
+        return self._cover_rear
+    cover_rear: io.BytesIO = property(get_cover_rear)
+
+    def get_page_list(self):
+        return self._page_list
+    page_list: list[list[str]] = property(get_page_list)
+
+
+    def read_page(self, page: list[str]) -> list[io.BytesIO]:
+        # the parts of a page of page_list
+        try:
+            return [io.BytesIO(self._source_file.read(part)) for part in page]
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            ecmbUtils.raise_exception(f'failed to read "{self._file_name}": ' + str(e))
+
+
+    def close(self) -> None:
+        if self._source_file != None:
+            self._source_file.close()
+            self._source_file = None
+
+
+    def _read_folder(self, node: ElementTree.Element, folder_path: str) -> None:
+        for child in node:
+            tag = self._get_tag(child)
+            if tag == 'dir':
+                self._read_folder(child, folder_path + '/' + child.get('name'))
+            elif tag in ['img', 'dimg']:
+                # double-pages can carry their left and right half
+                page = []
+                for attribute in ['src', 'src_left', 'src_right']:
+                    if child.get(attribute):
+                        page.append(folder_path + '/' + child.get(attribute))
+                self._page_list.append(page)
+
+
+    def _get_tag(self, node: ElementTree.Element) -> str:
+        # strip the namespace
+        return node.tag.split('}')[-1]
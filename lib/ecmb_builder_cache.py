@@ -0,0 +1,193 @@
+"""
+ File: ecmb_builder_cache.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, io, json, hashlib, shutil, threading
+from time import perf_counter
+from .ecmb_builder_enums import *
+from .resize.ecmb_builder_resize_base import ecmbBuilderResizeBase
+from .ecmblib.src.ecmblib import ecmbUtils
+
+
+class ecmbBuilderCache():
+
+    # v2: the header has the facts of the page beside the sizes of the parts
+    _cache_version = '2'
+
+    _cache_dir = None
+    _max_size = None
+
+    def __init__(self, cache_dir: str, max_size: int):
+        self._cache_dir = cache_dir
+        self._max_size = max_size * 1024 * 1024
+
+
+    def get_cache_dir(self):
+        return self._cache_dir
+    cache_dir: str = property(get_cache_dir)
+
+    def get_max_size(self):
+        return self._max_size
+    max_size: int = property(get_max_size)
+
+
+    def run_action(self, cache_action: CACHE_ACTION) -> None:
+        cache_action = ecmbUtils.enum_value(cache_action)
+        ecmbUtils.validate_enum(True, 'cache_action', cache_action, CACHE_ACTION)
+
+        if cache_action == CACHE_ACTION.CLEAR.value:
+            stats = self.get_stats()
+            self.clear()
+            print(f'  removed {stats["entries"]} images ({stats["size"] / 1024 / 1024:.1f} MB) from "{self._cache_dir}"', flush=True)
+        else:
+            stats = self.get_stats()
+            print(f'  cache-dir: {self._cache_dir}', flush=True)
+            print(f'  images:    {stats["entries"]}', flush=True)
+            print(f'  size:      {stats["size"] / 1024 / 1024:.1f} MB of {stats["max_size"] / 1024 / 1024:.0f} MB', flush=True)
+
+        print('', flush=True)
+
+
+    def process(self, resize_method: ecmbBuilderResizeBase, image_path: str, stats: dict) -> list[str|io.BytesIO]:
+        # the hash of an unchanged source is taken from the page-store
+        start = perf_counter()
+        page = resize_method.page_store.get_page(image_path) if resize_method.page_store != None else None
+        if page != None:
+            source_hash, source_size = page['hash'], page['size']
+        else:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+            source_hash, source_size = hashlib.sha256(data).hexdigest(), len(data)
+        self._add_stage_time(stats, 'cache_hash', start)
+
+        key = hashlib.sha256((self._cache_version + '|' + source_hash + '|' + resize_method.get_cache_key()).encode()).hexdigest()
+        file_name = self._cache_dir + key[0:2] + '\\' + key
+
+        start = perf_counter()
+        image, facts = self._read(file_name, image_path)
+        self._add_stage_time(stats, 'cache_read', start)
+        if image:
+            stats['cache_hit'] = True
+            stats['passthrough'] = facts.get('passthrough')
+            stats['grayscale'] = page.get('grayscale') if page != None else None
+            stats['bytes_in'] = source_size
+            stats['bytes_out'] = sum([source_size if type(part) == str else part.getbuffer().nbytes for part in image])
+            return image
+
+        stats['cache_hit'] = False
+        image = resize_method.process(image_path, stats)
+
+        start = perf_counter()
+        self._write(file_name, image, {'passthrough': stats.get('passthrough')})
+        self._add_stage_time(stats, 'cache_write', start)
+        return image
+
+
+    def cleanup(self) -> None:
+        # least recently used entries are removed first, hits are touching the entry
+        entry_list = self._list_entries()
+        total_size = sum([entry[2] for entry in entry_list])
+        if total_size <= self._max_size:
+            return
+
+        entry_list.sort(key=lambda entry: entry[1])
+        for file_name, mtime, size in entry_list:
+            try:
+                os.remove(file_name)
+            except OSError:
+                continue
+            total_size -= size
+            if total_size <= self._max_size:
+                break
+
+
+    def clear(self) -> None:
+        if os.path.isdir(self._cache_dir):
+            shutil.rmtree(self._cache_dir)
+
+
+    def get_stats(self) -> dict:
+        entry_list = self._list_entries()
+        return {
+            'entries': len(entry_list),
+            'size': sum([entry[2] for entry in entry_list]),
+            'max_size': self._max_size
+        }
+
+
+    def _add_stage_time(self, stats: dict, stage: str, start: float) -> None:
+        duration = perf_counter() - start
+        stats['stages'][stage] = stats['stages'].get(stage, 0) + duration
+        stats['spans'].append((stage, start, duration))
+
+
+    def _read(self, file_name: str, image_path: str) -> tuple[list[str|io.BytesIO], dict]:
+        try:
+            with open(file_name, 'rb') as f:
+                header = json.loads(f.readline())
+                image = []
+                for size in header['parts']:
+                    if size == None:
+                        image.append(image_path)
+                    else:
+                        data = f.read(size)
+                        if len(data) != size:
+                            return (None, None)
+                        image.append(io.BytesIO(data))
+            os.utime(file_name)
+        except (OSError, ValueError, KeyError, TypeError):
+            return (None, None)
+        return (image, header['facts'])
+
+
+    def _write(self, file_name: str, image: list[str|io.BytesIO], facts: dict) -> None:
+        # the source-path is stored as None, a hit will return the path of the current source-file
+        # the facts of the page which aren't in the page-store, eg. passthrough, are restored by a hit
+        header = {'parts': [None if type(part) == str else part.getbuffer().nbytes for part in image], 'facts': facts}
+        tmp_name = file_name + '.' + str(os.getpid()) + '_' + str(threading.get_ident()) + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            with open(tmp_name, 'wb') as f:
+                f.write(json.dumps(header).encode() + b'\n')
+                for part in image:
+                    if type(part) != str:
+                        f.write(part.getbuffer())
+            os.replace(tmp_name, file_name)
+        except OSError:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+
+    def _list_entries(self) -> list[tuple[str, float, int]]:
+        entry_list = []
+        if not os.path.isdir(self._cache_dir):
+            return entry_list
+        for folder in os.scandir(self._cache_dir):
+            if not folder.is_dir(follow_symlinks=False):
+                continue
+            for ele in os.scandir(folder.path):
+                if ele.is_file(follow_symlinks=False) and not ele.name.endswith('.tmp'):
+                    stat = ele.stat()
+                    entry_list.append((ele.path, stat.st_mtime, stat.st_size))
+        return entry_list
@@ -0,0 +1,123 @@
+"""
+ File: ecmb_builder_checkpoint.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, io, json, shutil
+
+
+class ecmbBuilderCheckpoint():
+
+    _checkpoint_version = 1
+
+    _work_dir = None
+    _content = None
+    _chapter_list = None
+    _page_list = None
+
+    def __init__(self, work_dir: str, content: dict):
+        # content are the settings which change the images, a checkpoint with other settings is useless
+        self._work_dir = work_dir
+        self._content = json.loads(json.dumps(content))
+        self._chapter_list = {}
+        self._page_list = []
+
+
+    def load(self) -> int:
+        try:
+            with open(self._work_dir + 'checkpoint.json', 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        if type(checkpoint) != dict or checkpoint.get('version') != self._checkpoint_version or checkpoint.get('content') != self._content or type(checkpoint.get('chapters')) != dict:
+            self.clear()
+            return 0
+
+        self._chapter_list = checkpoint['chapters']
+        return len(self._chapter_list)
+
+
+    def get_chapter(self, chapter_path: str, image_paths: list[str]) -> list[list[str]]:
+        # a finished chapter is only used if none of its source-files has changed since then
+        chapter = self._chapter_list.get(chapter_path)
+        if not chapter or chapter.get('inputs') != self._get_inputs(image_paths) or len(chapter.get('pages', [])) != len(image_paths):
+            return None
+
+        page_list = []
+        for image_path, page in zip(image_paths, chapter['pages']):
+            image = [image_path if part_name == None else self._work_dir + part_name for part_name in page]
+            for part in image:
+                if not os.path.exists(part):
+                    return None
+            page_list.append(image)
+        return page_list
+
+
+    def add_page(self, chapter_nr: int, image_path: str, image: list[str|io.BytesIO]) -> None:
+        os.makedirs(self._work_dir, exist_ok=True)
+        page = []
+        for part_nr in range(len(image)):
+            part = image[part_nr]
+            if type(part) == str:
+                # the source-file itself, which isn't compressed
+                page.append(None)
+                continue
+            part_name = f'{chapter_nr}_{len(self._page_list)}_{part_nr}.webp'
+            with open(self._work_dir + part_name, 'wb') as f:
+                f.write(part.getbuffer())
+            page.append(part_name)
+        self._page_list.append(page)
+
+
+    def commit_chapter(self, chapter_path: str, image_paths: list[str]) -> None:
+        self._chapter_list[chapter_path] = {'inputs': self._get_inputs(image_paths), 'pages': self._page_list}
+        self._page_list = []
+
+        checkpoint = {
+            'version': self._checkpoint_version,
+            'content': self._content,
+            'chapters': self._chapter_list
+        }
+        os.makedirs(self._work_dir, exist_ok=True)
+        with open(self._work_dir + 'checkpoint.json.tmp', 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(self._work_dir + 'checkpoint.json.tmp', self._work_dir + 'checkpoint.json')
+
+
+    def clear(self) -> None:
+        if os.path.isdir(self._work_dir):
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+        self._chapter_list = {}
+        self._page_list = []
+
+
+    def _get_inputs(self, image_paths: list[str]) -> list:
+        inputs = []
+        for image_path in image_paths:
+            try:
+                stat = os.stat(image_path)
+                inputs.append([image_path, stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                inputs.append([image_path, None, None])
+        return inputs
@@ -23,35 +23,90 @@
  SOFTWARE.
 """
 
-import re, os, yaml, path
-from .ecmb_builder_utils import ecmbBuilderUtils
-from .ecmblib.src.ecmblib import ecmbUtils, ecmbException, BOOK_TYPE
+import re, os, path, importlib
+from .ecmb_builder_enums import *
+from .ecmb_builder_ecmblib import ecmbUtils, ecmbException, BOOK_TYPE
 
 
 
 class ecmbBuilderConfig():
 
+    # the built-in resize-methods and imaging-backends as (module, class)
+    # other packages can add their own with the entry-points "ecmb_builder.resize_methods" and "ecmb_builder.imaging_backends"
+    _builtin_resize_methods = {
+        'none': ('lib.resize.ecmb_builder_resize_none', 'ecmbBuilderResizeNone'),
+        'max': ('lib.resize.ecmb_builder_resize_max', 'ecmbBuilderResizeMax'),
+        'stretch': ('lib.resize.ecmb_builder_resize_stretch', 'ecmbBuilderResizeStretch'),
+        'cover': ('lib.resize.ecmb_builder_resize_cover', 'ecmbBuilderResizeCover'),
+        'cropmax': ('lib.resize.ecmb_builder_resize_cropmax', 'ecmbBuilderResizeCropmax')
+    }
+    _builtin_imaging_backends = {
+        'pillow': ('lib.backend.ecmb_builder_backend_pillow', 'ecmbBuilderBackendPillow'),
+        'vips': ('lib.backend.ecmb_builder_backend_vips', 'ecmbBuilderBackendVips')
+    }
+
     _resize_methods = None
+    _imaging_backends = None
 
     _source_dir = None
     _output_dir = None
+    _cache_dir = None
+    _cache_max_size = None
+    _memory_budget = None
+    _checkpoints = None
 
     _default_resize_method = None
     _default_webp_compression = None
     _default_compress_all = None
+    _default_resize_profile = None
+    _default_spread_mode = None
+    _default_webp_profile = None
+    _default_lineart_lossless = None
+    _default_imaging_backend = None
     _default_book_type = None
     _default_resize_width = None
     _default_resize_height = None
     _default_book_language = None
 
     def __init__(self):
-        self._load_resize_methods()
         self._load_config()
 
 
     def get_resize_methods(self):
+        # the entry-points are only read if they are needed
+        if self._resize_methods == None:
+            self._resize_methods = {**self._load_plugins('ecmb_builder.resize_methods'), **self._builtin_resize_methods}
         return self._resize_methods
-    resize_methods: list = property(get_resize_methods)
+    resize_methods: dict = property(get_resize_methods)
+
+    def get_imaging_backends(self):
+        if self._imaging_backends == None:
+            self._imaging_backends = {**self._load_plugins('ecmb_builder.imaging_backends'), **self._builtin_imaging_backends}
+        return self._imaging_backends
+    imaging_backends: dict = property(get_imaging_backends)
+
+
+    def is_resize_method(self, method_name: str) -> bool:
+        return method_name in self._builtin_resize_methods or method_name in self.resize_methods
+
+
+    def is_imaging_backend(self, backend_name: str) -> bool:
+        return backend_name in self._builtin_imaging_backends or backend_name in self.imaging_backends
+
+
+    def load_resize_method(self, method_name: str) -> type:
+        resize_method = self._builtin_resize_methods.get(method_name)
+        if resize_method == None:
+            resize_method = self.resize_methods[method_name]
+        return getattr(importlib.import_module(resize_method[0]), resize_method[1])
+
+
+    def load_imaging_backend(self, backend_name: str = None) -> object:
+        backend_name = backend_name if backend_name else self._default_imaging_backend
+        backend = self._builtin_imaging_backends.get(backend_name)
+        if backend == None:
+            backend = self.imaging_backends[backend_name]
+        return getattr(importlib.import_module(backend[0]), backend[1])()
 
     def get_source_dir(self):
         return self._source_dir
@@ -61,6 +116,22 @@ class ecmbBuilderConfig():
         return self._output_dir
     output_dir: str = property(get_output_dir) 
 
+    def get_cache_dir(self):
+        return self._cache_dir
+    cache_dir: str = property(get_cache_dir) 
+
+    def get_cache_max_size(self):
+        return self._cache_max_size
+    cache_max_size: int = property(get_cache_max_size) 
+
+    def get_memory_budget(self):
+        return self._memory_budget
+    memory_budget: int = property(get_memory_budget) 
+
+    def get_checkpoints(self):
+        return self._checkpoints
+    checkpoints: bool = property(get_checkpoints) 
+
     def get_default_resize_method(self):
         return self._default_resize_method
     default_resize_method: str = property(get_default_resize_method) 
@@ -85,6 +156,26 @@ class ecmbBuilderConfig():
         return self._default_resize_height
     default_resize_height: int = property(get_default_resize_height) 
     
+    def get_default_resize_profile(self):
+        return self._default_resize_profile
+    default_resize_profile: str = property(get_default_resize_profile)
+
+    def get_default_spread_mode(self):
+        return self._default_spread_mode
+    default_spread_mode: str = property(get_default_spread_mode)
+
+    def get_default_webp_profile(self):
+        return self._default_webp_profile
+    default_webp_profile: str = property(get_default_webp_profile)
+
+    def get_default_lineart_lossless(self):
+        return self._default_lineart_lossless
+    default_lineart_lossless: bool = property(get_default_lineart_lossless)
+
+    def get_default_imaging_backend(self):
+        return self._default_imaging_backend
+    default_imaging_backend: str = property(get_default_imaging_backend)
+
     def get_default_book_language(self):
         return self._default_book_language
     default_book_language: str = property(get_default_book_language)
@@ -92,6 +183,7 @@ class ecmbBuilderConfig():
 
 
     def _load_config(self) -> None:
+        import yaml
         builder_path = str(path.Path(__file__).abspath().parent.parent) + '\\'
 
         try: 
@@ -126,17 +218,46 @@ class ecmbBuilderConfig():
             if not os.path.isdir(self._output_dir):
                 ecmbUtils.raise_exception('output-dir was not found!')
 
-            ecmbUtils.validate_in_list(True, 'default_resize_method', config.get('default_resize_method'), list(self._resize_methods.keys()), 1)
+            cache_dir = config.get('cache_dir')
+            if cache_dir:
+                if not re.search(r'[:]', cache_dir):
+                    cache_dir = builder_path + cache_dir
+                self._cache_dir = str(path.Path(cache_dir).abspath()) +  '\\'
+
+            if config.get('cache_max_size') != None:
+                ecmbUtils.validate_int(True, 'cache_max_size', config.get('cache_max_size'), 1, None, 1)
+
+            if config.get('memory_budget') != None:
+                ecmbUtils.validate_int(True, 'memory_budget', config.get('memory_budget'), 0, None, 1)
+
+            if not self.is_resize_method(config.get('default_resize_method')):
+                ecmbUtils.validate_in_list(True, 'default_resize_method', config.get('default_resize_method'), list(self.resize_methods.keys()), 1)
             ecmbUtils.validate_int(True, 'default_webp_compression', config.get('default_webp_compression'), 0, 100, 1)
             ecmbUtils.validate_enum(True, 'default_book_type', config.get('default_book_type'), BOOK_TYPE, 1)
             ecmbUtils.validate_int(True, 'default_resize_width', config.get('default_resize_width'), 100, 1800, 1)
             ecmbUtils.validate_int(True, 'default_resize_height', config.get('default_resize_height'), 100, 2400, 1)
+            if config.get('default_resize_profile') != None:
+                ecmbUtils.validate_enum(True, 'default_resize_profile', config.get('default_resize_profile'), RESIZE_PROFILE, 1)
+            if config.get('default_spread_mode') != None:
+                ecmbUtils.validate_enum(True, 'default_spread_mode', config.get('default_spread_mode'), SPREAD_MODE, 1)
+            if config.get('default_webp_profile') != None:
+                ecmbUtils.validate_enum(True, 'default_webp_profile', config.get('default_webp_profile'), WEBP_PROFILE, 1)
+            if config.get('default_imaging_backend') != None and not self.is_imaging_backend(config.get('default_imaging_backend')):
+                ecmbUtils.validate_in_list(True, 'default_imaging_backend', config.get('default_imaging_backend'), list(self.imaging_backends.keys()), 1)
             ecmbUtils.validate_regex(True, 'default_book_language', config.get('default_book_language'), r'^[a-z]{2}$', 1)
         except Exception as e:
             raise ecmbException('Your Builder-Config "ecmb_builder_config.yml" contains an invalid value or the value is missing:\n' + str(e))
         
         
+        self._cache_max_size = config.get('cache_max_size') if config.get('cache_max_size') else 2048
+        self._memory_budget = config.get('memory_budget') if config.get('memory_budget') != None else 512
+        self._checkpoints = False if config.get('checkpoints') == False else True
         self._default_compress_all = True if config.get('default_compress_all') else False
+        self._default_resize_profile = config.get('default_resize_profile') if config.get('default_resize_profile') else RESIZE_PROFILE.BALANCED.value
+        self._default_spread_mode = config.get('default_spread_mode') if config.get('default_spread_mode') else SPREAD_MODE.FULL.value
+        self._default_webp_profile = config.get('default_webp_profile') if config.get('default_webp_profile') else WEBP_PROFILE.BALANCED.value
+        self._default_lineart_lossless = True if config.get('default_lineart_lossless') else False
+        self._default_imaging_backend = config.get('default_imaging_backend') if config.get('default_imaging_backend') else 'pillow'
         self._default_resize_method = config.get('default_resize_method') 
         self._default_webp_compression = config.get('default_webp_compression')
         self._default_book_type = config.get('default_book_type')
@@ -144,14 +265,12 @@ class ecmbBuilderConfig():
         self._default_resize_height = config.get('default_resize_height')
         self._default_book_language = config.get('default_book_language')
 
-    
 
-    def _load_resize_methods(self) -> None:
-        resize_path = str(path.Path(__file__).abspath().parent) + '\\resize'
-        file_list = ecmbBuilderUtils.list_files(resize_path, None, r'^ecmb_builder_resize_(?!base)[a-z]+\.py$', 0)
-        
-        self._resize_methods = {}
-        for file in file_list:
-            key = re.search(r'ecmb_builder_resize_([a-z]+)\.py', file['name']).group(1)
-            mod = ('lib.resize.ecmb_builder_resize_' + key, 'ecmbBuilderResize' + (key.title()))
-            self._resize_methods[key] = mod
\ No newline at end of file
+
+    def _load_plugins(self, group: str) -> dict:
+        # "name = package.module:ClassName" in the entry-points of the installed packages
+        import importlib.metadata
+        plugins = {}
+        for entry_point in importlib.metadata.entry_points(group=group):
+            plugins[entry_point.name] = (entry_point.module, entry_point.attr)
+        return plugins
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+ File: ecmb_builder_dedupe.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import numpy
+from .ecmb_builder_page_store import ecmbBuilderPageStore
+
+
+class ecmbBuilderDedupe():
+
+    # dHash: 9x8 gray thumbnail, one bit per horizontal neighbour-pair
+    _hash_size = 8
+    # pages with at most this many different bits are near-duplicates
+    _max_distance = 4
+    # the hash is split into bands for the index, at least one band of a near-duplicate is equal
+    _band_bits = 8
+
+    _page_store = None
+
+    def __init__(self, page_store: ecmbBuilderPageStore):
+        self._page_store = page_store
+
+
+    def find_exact(self, image_paths: list[str]) -> dict:
+        # the duplicates with the first image which has the same content
+        originals = {}
+        duplicates = {}
+        for image_path in image_paths:
+            page = self._page_store.get_page(image_path)
+            if not page:
+                continue
+            if page['hash'] in originals:
+                duplicates[image_path] = originals[page['hash']]
+            else:
+                originals[page['hash']] = image_path
+        return duplicates
+
+
+    def find_near(self, image_paths: list[str], hash_list: list[int], duplicates: dict = None) -> list[tuple[str, str, int]]:
+        # the near-duplicates with the most similar image before them and the distance of the hashes
+        duplicates = duplicates if duplicates else {}
+        band_cnt = self._hash_size * self._hash_size // self._band_bits
+        band_mask = (1 << self._band_bits) - 1
+        index = [{} for band_nr in range(band_cnt)]
+        result = []
+        for image_nr, (image_path, dhash) in enumerate(zip(image_paths, hash_list)):
+            if dhash == None or image_path in duplicates:
+                continue
+            bands = [(dhash >> (band_nr * self._band_bits)) & band_mask for band_nr in range(band_cnt)]
+
+            candidates = set()
+            for band_nr, band in enumerate(bands):
+                candidates.update(index[band_nr].get(band, []))
+            if candidates:
+                distance, match_nr = min([((dhash ^ hash_list[candidate_nr]).bit_count(), candidate_nr) for candidate_nr in candidates])
+                if distance <= self._max_distance:
+                    result.append((image_path, image_paths[match_nr], distance))
+
+            for band_nr, band in enumerate(bands):
+                index[band_nr].setdefault(band, []).append(image_nr)
+        return result
+
+
+    @staticmethod
+    def get_dhash(pixels: numpy.ndarray) -> int:
+        # the gray thumbnail of the page is averaged to 9x8 pixels, None if it's too small
+        hash_size = ecmbBuilderDedupe._hash_size
+        height, width = pixels.shape
+        if height < hash_size or width < hash_size + 1:
+            return None
+        rows = numpy.linspace(0, height, hash_size + 1).astype(int)
+        cols = numpy.linspace(0, width, hash_size + 2).astype(int)
+        sums = numpy.add.reduceat(numpy.add.reduceat(pixels.astype(numpy.int64), rows[:-1], axis=0), cols[:-1], axis=1)
+        means = sums / numpy.outer(numpy.diff(rows), numpy.diff(cols))
+
+        bits = numpy.packbits(means[:, 1:] > means[:, :-1])
+        return int.from_bytes(bits.tobytes(), 'big')
@@ -0,0 +1,55 @@
+"""
+ File: ecmb_builder_ecmblib.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, sys, importlib.util
+
+
+# the package of ecmblib imports ecmbBook and with it PIL and lxml, the utils and the enums only need the standard-library
+# the modules are loaded from their files and registered with their own names, so the package uses the same classes when it's imported later
+def _load_module(name: str):
+    module_name = __package__ + '.ecmblib.src.ecmblib.lib.' + name
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ecmblib', 'src', 'ecmblib', 'lib', name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except:
+            del sys.modules[module_name]
+            raise
+    return sys.modules[module_name]
+
+
+_utils = _load_module('ecmb_utils')
+_enums = _load_module('ecmb_enums')
+
+ecmbUtils = _utils.ecmbUtils
+ecmbException = _utils.ecmbException
+
+BOOK_TYPE = _enums.BOOK_TYPE
+BASED_ON_TYPE = _enums.BASED_ON_TYPE
+CONTENT_WARNING = _enums.CONTENT_WARNING
+AUTHOR_ROLE = _enums.AUTHOR_ROLE
+EDITOR_ROLE = _enums.EDITOR_ROLE
@@ -41,4 +41,38 @@ class RENAME_TYPE(Enum):
 class INIT_TYPE(Enum):
     BASIC = 'basic'
     TRANSLATED = 'translated'
-    FULL = 'full'
\ No newline at end of file
+    FULL = 'full'
+
+class EXECUTOR_TYPE(Enum):
+    THREAD = 'thread'
+    PROCESS = 'process'
+
+class CACHE_ACTION(Enum):
+    CLEAR = 'clear'
+    STATS = 'stats'
+
+class MANIFEST_STATE(Enum):
+    UP_TO_DATE = 'up_to_date'
+    META_DATA = 'meta_data'
+    OUTDATED = 'outdated'
+
+class RESIZE_PROFILE(Enum):
+    QUALITY = 'quality'
+    BALANCED = 'balanced'
+    FAST = 'fast'
+
+class SPREAD_MODE(Enum):
+    FULL = 'full'
+    DOWNSCALE = 'downscale'
+    SPLIT = 'split'
+
+class WEBP_PROFILE(Enum):
+    FAST = 'fast'
+    BALANCED = 'balanced'
+    MAX = 'max'
+
+class PAGE_TYPE(Enum):
+    LINEART = 'lineart'
+    COLOUR = 'colour'
+    SPREAD = 'spread'
+    BORDERED = 'bordered'
@@ -0,0 +1,103 @@
+"""
+ File: ecmb_builder_executor.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from .ecmb_builder_enums import *
+from .ecmblib.src.ecmblib import ecmbUtils
+
+
+class ecmbBuilderExecutor():
+
+    _workers = None
+    _executor_type = None
+    _executor = None
+    _executor_lock = None
+
+    def __init__(self, workers: int = 1, executor_type: EXECUTOR_TYPE = EXECUTOR_TYPE.THREAD):
+        executor_type = ecmbUtils.enum_value(executor_type)
+        ecmbUtils.validate_enum(True, 'executor', executor_type, EXECUTOR_TYPE)
+
+        workers = int(workers) if str(workers).isnumeric() else workers
+        ecmbUtils.validate_int(True, 'workers', workers, 0, 256)
+
+        self._workers = workers if workers else (os.cpu_count() or 1)
+        self._executor_type = executor_type
+        self._executor_lock = threading.Lock()
+
+
+    def get_workers(self):
+        return self._workers
+    workers: int = property(get_workers)
+
+    def get_executor_type(self):
+        return self._executor_type
+    executor_type: str = property(get_executor_type)
+
+
+    def map(self, func: callable, item_list: list) -> iter:
+        # results are yielded in the order of item_list, no matter which worker finished first
+        if self._workers == 1:
+            return map(func, item_list)
+        return self._map_bounded(func, item_list)
+
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+
+
+    def _map_bounded(self, func: callable, item_list: list) -> iter:
+        # only a few items per worker are in flight, so finished results don't pile up in memory
+        executor = self._get_executor()
+        pending = deque()
+        for item in item_list:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= self._workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+    def _get_executor(self) -> Executor:
+        # the executor can be shared by the threads of more than one book, so the pool is created only once
+        with self._executor_lock:
+            if not self._executor:
+                if self._executor_type == EXECUTOR_TYPE.PROCESS.value:
+                    self._executor = ProcessPoolExecutor(max_workers=self._workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers)
+            return self._executor
@@ -0,0 +1,190 @@
+"""
+ File: ecmb_builder_index.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import re, os
+
+
+class ecmbBuilderIndex():
+
+    # the folders and files of a directory-tree, read once with os.scandir and then queried from memory
+    _extension_pattern = re.compile(r'\.([a-z0-9]+)$', re.IGNORECASE)
+    _number_pattern = re.compile(r'([0-9]+)')
+
+    _root_dir = None
+    _tree = None
+    _sorted = None
+    _patterns = None
+
+    def __init__(self, root_dir: str, max_level: int = None):
+        self._root_dir = self._get_dir(root_dir)
+        self._tree = {}
+        self._sorted = {}
+        self._patterns = {}
+        self._scan(self._root_dir, max_level)
+
+
+    def get_root_dir(self):
+        return self._root_dir
+    root_dir: str = property(get_root_dir)
+
+
+    @staticmethod
+    def natural_sort_key(name: str) -> tuple:
+        # "page2" before "page10", text is compared case-insensitive and the name itself decides ties
+        parts = ecmbBuilderIndex._number_pattern.split(name.lower())
+        parts[1::2] = map(int, parts[1::2])
+        return (parts, name)
+
+
+    def list_dirs(self, dirname: str, dir_pattern: str = None, max_level: int = None) -> list[dict]:
+        dir_pattern = self._compile(dir_pattern)
+        return self._list_dirs(self._get_dir(dirname), dir_pattern, max_level, 0)
+
+
+    def list_files(self, dirname: str, dir_pattern: str = None, file_pattern: str = None, max_level: int = None) -> list[dict]:
+        dir_pattern = self._compile(dir_pattern)
+        file_pattern = self._compile(file_pattern)
+        return self._list_files(self._get_dir(dirname), dir_pattern, file_pattern, max_level, 0)
+
+
+    def add_dir(self, path: str) -> None:
+        parent, name = self._split(path)
+        if parent in self._tree:
+            self._tree[parent][0].add(name)
+            self._sorted.pop(parent, None)
+        self._tree[self._get_dir(path)] = (set(), set())
+
+
+    def move(self, old_path: str, new_path: str) -> None:
+        # the index follows os.rename, so a renamer doesn't have to read the folders again
+        old_parent, old_name = self._split(old_path)
+        new_parent, new_name = self._split(new_path)
+        old_dir = self._get_dir(old_path)
+        new_dir = self._get_dir(new_path)
+
+        is_dir = old_dir in self._tree
+        entry_nr = 0 if is_dir else 1
+        if old_parent in self._tree:
+            self._tree[old_parent][entry_nr].discard(old_name)
+            self._sorted.pop(old_parent, None)
+        if new_parent in self._tree:
+            self._tree[new_parent][entry_nr].add(new_name)
+            self._sorted.pop(new_parent, None)
+
+        if is_dir:
+            for dirname in [dirname for dirname in self._tree.keys() if dirname.startswith(old_dir)]:
+                self._tree[new_dir + dirname[len(old_dir):]] = self._tree.pop(dirname)
+                self._sorted.pop(dirname, None)
+
+
+    def remove_dir(self, path: str) -> None:
+        parent, name = self._split(path)
+        if parent in self._tree:
+            self._tree[parent][0].discard(name)
+            self._sorted.pop(parent, None)
+        dirname = self._get_dir(path)
+        for sub_dir in [sub_dir for sub_dir in self._tree.keys() if sub_dir.startswith(dirname)]:
+            del self._tree[sub_dir]
+            self._sorted.pop(sub_dir, None)
+
+
+    def _list_dirs(self, dirname: str, dir_pattern: re.Pattern, max_level: int, level: int) -> list[dict]:
+        # the sub-folders follow their folder, like the recursive listing before
+        dir_list = []
+        for name in self._get_entries(dirname)[0]:
+            if dir_pattern == None or dir_pattern.search(name):
+                dir_list.append({'path': dirname, 'name': name, 'level': level})
+                if type(max_level) != int or level < max_level:
+                    dir_list += self._list_dirs(dirname + name + '\\', dir_pattern, max_level, level + 1)
+        return dir_list
+
+
+    def _list_files(self, dirname: str, dir_pattern: re.Pattern, file_pattern: re.Pattern, max_level: int, level: int) -> list[dict]:
+        file_list = []
+        dirs, files = self._get_entries(dirname)
+        for name, extension in files:
+            if file_pattern == None or file_pattern.search(name):
+                file_list.append({'path': dirname, 'name': name, 'level': level, 'extension': extension})
+        if type(max_level) != int or level < max_level:
+            for name in dirs:
+                if dir_pattern == None or dir_pattern.search(name):
+                    file_list += self._list_files(dirname + name + '\\', dir_pattern, file_pattern, max_level, level + 1)
+        return file_list
+
+
+    def _get_entries(self, dirname: str) -> tuple[list[str], list[tuple[str, str]]]:
+        # folders outside of the indexed levels are read when they are needed
+        if dirname not in self._tree:
+            self._scan(dirname, 0)
+        if dirname not in self._sorted:
+            dirs, files = self._tree[dirname]
+            files = [(name, self._get_extension(name)) for name in sorted(files, key=self.natural_sort_key)]
+            self._sorted[dirname] = (sorted(dirs, key=self.natural_sort_key), files)
+        return self._sorted[dirname]
+
+
+    def _scan(self, root_dir: str, max_level: int = None) -> None:
+        # one os.scandir per folder, the type of the entries is known without an extra stat on most systems
+        stack = [(root_dir, 0)]
+        while stack:
+            dirname, level = stack.pop()
+            dirs = set()
+            files = set()
+            try:
+                with os.scandir(dirname) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.add(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.add(entry.name)
+            except OSError:
+                pass
+            self._tree[dirname] = (dirs, files)
+            self._sorted.pop(dirname, None)
+            if type(max_level) != int or level < max_level:
+                stack += [(dirname + name + '\\', level + 1) for name in dirs]
+
+
+    def _compile(self, pattern: str) -> re.Pattern:
+        if pattern == None:
+            return None
+        if pattern not in self._patterns:
+            self._patterns[pattern] = re.compile(pattern, re.IGNORECASE)
+        return self._patterns[pattern]
+
+
+    def _get_extension(self, name: str) -> str:
+        extension = self._extension_pattern.search(name)
+        return extension.group(1).lower() if extension else None
+
+
+    def _get_dir(self, dirname: str) -> str:
+        return dirname if dirname[-1] in ['/', '\\'] else dirname + '\\'
+
+
+    def _split(self, path: str) -> tuple[str, str]:
+        path = path.rstrip('\\')
+        parent, name = path.rsplit('\\', 1)
+        return (parent + '\\', name)
@@ -0,0 +1,146 @@
+"""
+ File: ecmb_builder_lock.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, json, socket, threading
+from time import time
+from contextlib import contextmanager
+
+
+class ecmbBuilderLock():
+
+    # a lock which isn't refreshed for this time is left over from a crashed build
+    _stale_after = 15 * 60
+    _refresh_interval = 60
+
+    _file_name = None
+    _owner = None
+    _is_locked = False
+    _last_refresh = None
+
+    def __init__(self, file_name: str):
+        self._file_name = file_name
+        self._owner = socket.gethostname() + ':' + str(os.getpid()) + ':' + str(threading.get_ident())
+
+
+    def get_is_locked(self):
+        return self._is_locked
+    is_locked: bool = property(get_is_locked)
+
+
+    def acquire(self) -> bool:
+        # O_EXCL is atomic on local disks and on NFSv3+, so only one node can create the file
+        os.makedirs(os.path.dirname(self._file_name), exist_ok=True)
+        for attempt in range(2):
+            try:
+                fd = os.open(self._file_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if attempt == 0 and self._remove_stale():
+                    continue
+                return False
+
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'owner': self._owner, 'time': time()}, f)
+            self._is_locked = True
+            self._last_refresh = time()
+            return True
+        return False
+
+
+    def refresh(self) -> None:
+        if self._is_locked and time() - self._last_refresh >= self._refresh_interval:
+            try:
+                os.utime(self._file_name)
+            except OSError:
+                pass
+            self._last_refresh = time()
+
+
+    @contextmanager
+    def keep_alive(self):
+        # for stages which don't call refresh() for a long time, eg. writing the book
+        stop = threading.Event()
+        thread = threading.Thread(target=self._keep_alive, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+
+    def release(self) -> None:
+        if not self._is_locked:
+            return
+        self._is_locked = False
+        # the lock could have been taken over if it was stale, then it isn't ours anymore
+        if self._read_owner() == self._owner:
+            try:
+                os.remove(self._file_name)
+            except OSError:
+                pass
+
+
+    def _keep_alive(self, stop: threading.Event) -> None:
+        while not stop.wait(self._refresh_interval):
+            self.refresh()
+
+
+    def _remove_stale(self) -> bool:
+        # the stale lock is renamed first, only one node can rename it, so only one node takes it over
+        stale_name = self._file_name + '.' + self._owner.replace(':', '_') + '.stale'
+        try:
+            if time() - os.path.getmtime(self._file_name) < self._stale_after:
+                return False
+            os.rename(self._file_name, stale_name)
+        except FileNotFoundError:
+            # removed by another node, so it can be acquired again
+            return True
+        except OSError:
+            return False
+
+        try:
+            # another node could have taken it over between the check and the rename, then its new lock is put back
+            if time() - os.path.getmtime(stale_name) < self._stale_after:
+                try:
+                    os.link(stale_name, self._file_name)
+                except OSError:
+                    pass
+                return False
+            return True
+        except OSError:
+            return False
+        finally:
+            try:
+                os.remove(stale_name)
+            except OSError:
+                pass
+
+
+    def _read_owner(self) -> str:
+        try:
+            with open(self._file_name, 'r') as f:
+                return json.load(f).get('owner')
+        except (OSError, ValueError, AttributeError):
+            return None
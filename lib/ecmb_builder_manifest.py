@@ -0,0 +1,123 @@
+"""
+ File: ecmb_builder_manifest.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, json, hashlib
+from .ecmb_builder_enums import *
+
+
+class ecmbBuilderManifest():
+
+    _manifest_version = 1
+
+    _file_name = None
+
+    def __init__(self, file_name: str):
+        self._file_name = file_name
+
+
+    def get_state(self, target_file: str, input_list: list[str], settings: dict) -> MANIFEST_STATE:
+        # settings['content'] are the settings which change the images, the rest only changes the meta-data
+        if not os.path.exists(target_file) or not os.path.exists(self._file_name):
+            return MANIFEST_STATE.OUTDATED
+
+        try:
+            with open(self._file_name, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return MANIFEST_STATE.OUTDATED
+
+        if manifest.get('version') != self._manifest_version or type(manifest.get('settings')) != dict:
+            return MANIFEST_STATE.OUTDATED
+
+        settings = json.loads(json.dumps(settings))
+        if manifest['settings'].get('content') != settings.get('content'):
+            return MANIFEST_STATE.OUTDATED
+
+        touched = []
+        if not self._inputs_unchanged(manifest.get('inputs'), input_list, touched):
+            return MANIFEST_STATE.OUTDATED
+
+        # touched files with the same content get their new mtime, so they aren't hashed again on the next run
+        if touched:
+            for file_path, mtime in touched:
+                manifest['inputs'][file_path][1] = mtime
+            self._save(manifest)
+
+        if manifest['settings'] != settings:
+            return MANIFEST_STATE.META_DATA
+
+        return MANIFEST_STATE.UP_TO_DATE
+
+
+    def write(self, input_list: list[str], settings: dict) -> None:
+        inputs = {}
+        for file_path in input_list:
+            stat = os.stat(file_path)
+            inputs[file_path] = [stat.st_size, stat.st_mtime_ns, self._hash_file(file_path)]
+
+        self._save({
+            'version': self._manifest_version,
+            'settings': settings,
+            'inputs': inputs
+        })
+
+
+    def remove(self) -> None:
+        if os.path.exists(self._file_name):
+            os.remove(self._file_name)
+
+
+    def _save(self, manifest: dict) -> None:
+        os.makedirs(os.path.dirname(self._file_name), exist_ok=True)
+        tmp_name = self._file_name + '.tmp'
+        with open(tmp_name, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_name, self._file_name)
+
+
+    def _inputs_unchanged(self, inputs: dict, input_list: list[str], touched: list) -> bool:
+        if type(inputs) != dict or list(inputs.keys()) != input_list:
+            return False
+
+        # size and mtime are enough for untouched files, only touched files are hashed
+        for file_path in input_list:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return False
+            size, mtime, file_hash = inputs[file_path]
+            if stat.st_size != size:
+                return False
+            if stat.st_mtime_ns != mtime:
+                if self._hash_file(file_path) != file_hash:
+                    return False
+                touched.append((file_path, stat.st_mtime_ns))
+
+        return True
+
+
+    def _hash_file(self, file_path: str) -> str:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,191 @@
+"""
+ File: ecmb_builder_page_store.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, io, json, hashlib, sqlite3, threading
+from urllib.request import pathname2url
+from .ecmb_builder_ecmblib import ecmbUtils
+
+
+class ecmbBuilderPageStore():
+
+    _store_version = 5
+
+    # facts which are only known after decoding, they are set by the code which decodes the image
+    _analysis_columns = ['grayscale', 'crop_box', 'dhash']
+
+    # the keys of image.info with meta-data, a webp with meta-data isn't passed through
+    _metadata_keys = ['exif', 'xmp', 'XML:com.adobe.xmp', 'icc_profile', 'photoshop', 'comment']
+
+    _file_name = None
+    _read_only = None
+    _local = None
+
+    def __init__(self, file_name: str, read_only: bool = False):
+        self._file_name = file_name
+        self._read_only = read_only
+        self._local = threading.local()
+
+
+    def __getstate__(self):
+        # the connections can't be pickled, the worker-processes open their own
+        return {'_file_name': self._file_name, '_read_only': self._read_only}
+
+
+    def __setstate__(self, state: dict):
+        self._file_name = state['_file_name']
+        self._read_only = state['_read_only']
+        self._local = threading.local()
+
+
+    def get_file_name(self):
+        return self._file_name
+    file_name: str = property(get_file_name)
+
+    def get_read_only(self):
+        return self._read_only
+    read_only: bool = property(get_read_only)
+
+
+    @staticmethod
+    def read_header(pillow_image: 'Image.Image') -> dict:
+        return {
+            'width': pillow_image.size[0],
+            'height': pillow_image.size[1],
+            'mode': pillow_image.mode,
+            'format': pillow_image.format,
+            'animated': bool(getattr(pillow_image, 'is_animated', False)),
+            'metadata': any([pillow_image.info.get(key) for key in ecmbBuilderPageStore._metadata_keys])
+        }
+
+
+    def get_page(self, image_path: str) -> dict:
+        # the entry is only valid as long as size and mtime of the file are unchanged, None if it isn't an image
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+
+        connection = self._get_connection()
+        row = connection.execute('SELECT * FROM pages WHERE path = ?', (image_path,)).fetchone() if connection != None else None
+        if row and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime_ns:
+            return self._get_page(row)
+
+        # pillow is only imported if an image has to be read, renaming doesn't need it
+        from PIL import Image
+        try:
+            with open(image_path, 'rb') as f:
+                data = f.read()
+            with Image.open(io.BytesIO(data)) as pillow_image:
+                header = self.read_header(pillow_image)
+        except (OSError, Image.UnidentifiedImageError, Image.DecompressionBombError):
+            return None
+
+        page = {'path': image_path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, **header, 'hash': hashlib.sha256(data).hexdigest(), 'grayscale': None, 'crop_box': None, 'dhash': None}
+        if self._read_only:
+            return page
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO pages (path, size, mtime, width, height, mode, format, animated, metadata, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                image_path, page['size'], page['mtime'], page['width'], page['height'], page['mode'], page['format'], int(page['animated']), int(page['metadata']), page['hash']
+            ))
+        return page
+
+
+    def set_page(self, image_path: str, **values) -> None:
+        for name in values.keys():
+            if name not in self._analysis_columns:
+                ecmbUtils.raise_exception(f'"{name}" can\'t be set!')
+        if self._read_only:
+            return
+
+        values = {name: json.dumps(value) for name, value in values.items()}
+        with self._get_connection() as connection:
+            connection.execute('UPDATE pages SET ' + ', '.join([name + ' = ?' for name in values.keys()]) + ' WHERE path = ?', (*values.values(), image_path))
+
+
+    def remove_missing(self) -> None:
+        if self._read_only:
+            return
+        connection = self._get_connection()
+        missing = [(row['path'],) for row in connection.execute('SELECT path FROM pages') if not os.path.exists(row['path'])]
+        with connection:
+            connection.executemany('DELETE FROM pages WHERE path = ?', missing)
+
+
+    def _get_page(self, row: sqlite3.Row) -> dict:
+        page = dict(row)
+        page['animated'] = bool(page['animated'])
+        page['metadata'] = bool(page['metadata'])
+        for name in self._analysis_columns:
+            page[name] = json.loads(page[name]) if page[name] != None else None
+        return page
+
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # one connection per thread, a forked worker-process can't use the connections of its parent
+        if getattr(self._local, 'pid', None) == os.getpid():
+            return self._local.connection
+        if self._read_only:
+            self._local.connection = self._connect_read_only()
+            self._local.pid = os.getpid()
+            return self._local.connection
+
+        try:
+            os.makedirs(os.path.dirname(self._file_name), exist_ok=True)
+            connection = sqlite3.connect(self._file_name, timeout=60)
+        except (OSError, sqlite3.Error) as e:
+            ecmbUtils.raise_exception(f'the page-store "{self._file_name}" can\'t be opened: ' + str(e))
+        connection.row_factory = sqlite3.Row
+        # the output_dir can be shared by several nodes, WAL only works on one host and not on network-drives
+        # the journal-mode is saved in the file, so it's set explicitly for stores of older versions
+        connection.execute('PRAGMA journal_mode = DELETE')
+        connection.execute('PRAGMA synchronous = NORMAL')
+
+        with connection:
+            # the version is checked in a write-transaction, so parallel processes don't create the table twice
+            connection.execute('BEGIN IMMEDIATE')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != self._store_version:
+                connection.execute('DROP TABLE IF EXISTS pages')
+                connection.execute('''CREATE TABLE pages (
+                    path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER,
+                    width INTEGER, height INTEGER, mode TEXT, format TEXT, animated INTEGER, metadata INTEGER,
+                    hash TEXT, grayscale TEXT, crop_box TEXT, dhash TEXT
+                )''')
+                connection.execute(f'PRAGMA user_version = {self._store_version}')
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+
+    def _connect_read_only(self) -> sqlite3.Connection:
+        # eg. for a dry-run, nothing is created or written, None if there is no store of this version
+        if not os.path.isfile(self._file_name):
+            return None
+        connection = sqlite3.connect('file:' + pathname2url(self._file_name) + '?mode=ro', uri=True, timeout=60)
+        if connection.execute('PRAGMA user_version').fetchone()[0] != self._store_version:
+            connection.close()
+            return None
+        connection.row_factory = sqlite3.Row
+        return connection
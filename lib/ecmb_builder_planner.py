@@ -0,0 +1,125 @@
+"""
+ File: ecmb_builder_planner.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, random
+from time import process_time
+from PIL import Image
+from .ecmb_builder_report import ecmbBuilderReport
+from .resize.ecmb_builder_resize_base import ecmbBuilderResizeBase
+from .ecmblib.src.ecmblib import ecmbUtils
+
+
+class ecmbBuilderPlanner():
+
+    _resize_method = None
+    _samples = None
+    _random = None
+
+    def __init__(self, resize_method: ecmbBuilderResizeBase, samples: int = 3, seed: int = 0):
+        samples = int(samples) if str(samples).isnumeric() else samples
+        ecmbUtils.validate_int(True, 'samples', samples, 1)
+
+        self._resize_method = resize_method
+        self._samples = samples
+        self._random = random.Random(seed)
+
+
+    def get_samples(self):
+        return self._samples
+    samples: int = property(get_samples)
+
+
+    def plan_volume(self, file_name: str, cover_list: list[str], chapter_images: list[list[str]], resize_method: ecmbBuilderResizeBase = None) -> dict:
+        # a volume can have its own resize-method, eg. with the page-budget of the volume-size
+        resize_method = resize_method if resize_method != None else self._resize_method
+        result = {
+            'file_name': file_name,
+            'pages': 0,
+            'split_pages': 0,
+            'sampled_pages': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'cpu_time': 0
+        }
+
+        # the covers are only 2 images, so they are processed completely
+        for image_path in cover_list:
+            result['bytes_in'] += os.path.getsize(image_path)
+            self._add_samples(resize_method, result, [image_path], [image_path])
+
+        for image_list in chapter_images:
+            self._plan_chapter(resize_method, result, image_list)
+
+        result['bytes_out'] = round(result['bytes_out'])
+        return result
+
+
+    def _plan_chapter(self, resize_method: ecmbBuilderResizeBase, result: dict, image_list: list[str]) -> None:
+        # only the header is read to get the size, single- and double-pages are sampled separately because double-pages are split into 3 images
+        single_list = []
+        double_list = []
+        for image_path in image_list:
+            page = resize_method.page_store.get_page(image_path) if resize_method.page_store != None else None
+            if page != None:
+                result['bytes_in'] += page['size']
+                width, height = page['width'], page['height']
+            else:
+                result['bytes_in'] += os.path.getsize(image_path)
+                with Image.open(image_path) as pillow_image:
+                    width, height = pillow_image.size
+            if resize_method.is_double_page(width, height):
+                double_list.append(image_path)
+            else:
+                single_list.append(image_path)
+
+        result['pages'] += len(image_list)
+        result['split_pages'] += len(double_list)
+
+        for page_list in [single_list, double_list]:
+            if len(page_list) == 0:
+                continue
+            sample_list = self._random.sample(page_list, min(self._samples, len(page_list)))
+            self._add_samples(resize_method, result, page_list, sample_list)
+
+
+    def _add_samples(self, resize_method: ecmbBuilderResizeBase, result: dict, page_list: list[str], sample_list: list[str]) -> None:
+        bytes_out = 0
+        cpu_time = 0
+        for image_path in sample_list:
+            # the CPU-time of the process and not the wall-time, the encode-threads of double-pages are counted too
+            start = process_time()
+            page_stats = ecmbBuilderReport.start_page(image_path)
+            image = resize_method.process(image_path, page_stats)
+            ecmbBuilderReport.end_page(page_stats)
+            cpu_time += process_time() - start
+            for part in image:
+                if type(part) != str:
+                    part.close()
+            bytes_out += page_stats['bytes_out']
+
+        factor = len(page_list) / len(sample_list)
+        result['bytes_out'] += bytes_out * factor
+        result['cpu_time'] += cpu_time * factor
+        result['sampled_pages'] += len(sample_list)
@@ -0,0 +1,173 @@
+"""
+ File: ecmb_builder_report.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, json, threading
+from time import perf_counter
+
+
+class ecmbBuilderReport():
+
+    _book_name = None
+    _stage_list = None
+    _page_list = None
+    _duplicate_list = None
+
+    def __init__(self, book_name: str):
+        self._book_name = book_name
+        self._stage_list = []
+        self._page_list = []
+        self._duplicate_list = []
+
+
+    @staticmethod
+    def start_page(image_path: str) -> dict:
+        return {
+            'path': image_path,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'start': perf_counter(),
+            'duration': 0,
+            'cache_hit': None,
+            'passthrough': False,
+            'grayscale': None,
+            'duplicate_of': None,
+            'normalized': [],
+            'normalize_bytes_saved': 0,
+            'normalize_time_saved': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'pixels_in': 0,
+            'pixels_out': 0,
+            'stages': {},
+            'spans': []
+        }
+
+
+    @staticmethod
+    def end_page(page_stats: dict) -> dict:
+        page_stats['duration'] = perf_counter() - page_stats['start']
+        return page_stats
+
+
+    def add_stage(self, stage: str, start: float, duration: float = None) -> None:
+        duration = duration if duration != None else perf_counter() - start
+        self._stage_list.append({'stage': stage, 'start': start, 'duration': duration})
+
+
+    def add_page(self, page_stats: dict) -> None:
+        self._page_list.append(page_stats)
+
+
+    def add_duplicate(self, page: dict, original: dict, distance: int, exact: bool) -> None:
+        # page and original are the locations with path, chapter and page-nr
+        self._duplicate_list.append({'page': page, 'duplicate_of': original, 'distance': distance, 'exact': exact})
+
+
+    def get_totals(self) -> dict:
+        totals = {
+            'pages': len(self._page_list),
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'passthrough': 0,
+            'gray_pages': 0,
+            'colour_pages': 0,
+            'duplicates': len([duplicate for duplicate in self._duplicate_list if duplicate['exact']]),
+            'near_duplicates': len([duplicate for duplicate in self._duplicate_list if not duplicate['exact']]),
+            'normalized_pages': 0,
+            'normalized': {'icc': 0, 'depth': 0, 'alpha': 0},
+            'normalize_bytes_saved': 0,
+            'normalize_time_saved': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'pixels_in': 0,
+            'pixels_out': 0,
+            'page_stages': {},
+            'build_stages': {}
+        }
+        for page in self._page_list:
+            if page['cache_hit'] == True:
+                totals['cache_hits'] += 1
+            elif page['cache_hit'] == False:
+                totals['cache_misses'] += 1
+            if page.get('passthrough'):
+                totals['passthrough'] += 1
+            if page.get('grayscale') == True:
+                totals['gray_pages'] += 1
+            elif page.get('grayscale') == False:
+                totals['colour_pages'] += 1
+            if page.get('normalized'):
+                totals['normalized_pages'] += 1
+                for step in page['normalized']:
+                    totals['normalized'][step] = totals['normalized'].get(step, 0) + 1
+            totals['normalize_bytes_saved'] += page.get('normalize_bytes_saved', 0)
+            totals['normalize_time_saved'] += page.get('normalize_time_saved', 0)
+            for key in ['bytes_in', 'bytes_out', 'pixels_in', 'pixels_out']:
+                totals[key] += page[key]
+            for stage, duration in page['stages'].items():
+                totals['page_stages'][stage] = totals['page_stages'].get(stage, 0) + duration
+        for stage in self._stage_list:
+            totals['build_stages'][stage['stage']] = totals['build_stages'].get(stage['stage'], 0) + stage['duration']
+        return totals
+
+
+    def write(self, file_name: str) -> None:
+        report = {
+            'book': self._book_name,
+            'totals': self.get_totals(),
+            'stages': [{'stage': stage['stage'], 'duration': stage['duration']} for stage in self._stage_list],
+            'duplicates': self._duplicate_list,
+            'pages': [{key: value for key, value in page.items() if key not in ['pid', 'tid', 'start', 'spans']} for page in self._page_list]
+        }
+        self._write_json(file_name, report)
+
+
+    def write_trace(self, file_name: str) -> None:
+        # Chrome-trace format, can be opened with chrome://tracing or https://ui.perfetto.dev
+        pid = os.getpid()
+        event_list = []
+        for stage in self._stage_list:
+            event_list.append(self._get_trace_event(stage['stage'], 'build', stage['start'], stage['duration'], pid, 0))
+
+        for page in self._page_list:
+            name = os.path.basename(page['path'].replace('\\', '/'))
+            args = {key: page.get(key) for key in ['path', 'cache_hit', 'grayscale', 'duplicate_of', 'normalized', 'normalize_bytes_saved', 'normalize_time_saved', 'bytes_in', 'bytes_out', 'pixels_in', 'pixels_out']}
+            event_list.append(self._get_trace_event(name, 'page', page['start'], page['duration'], page['pid'], page['tid'], args))
+            for stage, start, duration in page['spans']:
+                event_list.append(self._get_trace_event(stage, 'stage', start, duration, page['pid'], page['tid']))
+
+        self._write_json(file_name, {'traceEvents': event_list, 'displayTimeUnit': 'ms'})
+
+
+    def _get_trace_event(self, name: str, category: str, start: float, duration: float, pid: int, tid: int, args: dict = None) -> dict:
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': round(start * 1000000), 'dur': round(duration * 1000000), 'pid': pid, 'tid': tid}
+        if args:
+            event['args'] = args
+        return event
+
+
+    def _write_json(self, file_name: str, data: dict) -> None:
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'w') as f:
+            json.dump(data, f, indent=1)
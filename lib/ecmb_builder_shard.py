@@ -0,0 +1,60 @@
+"""
+ File: ecmb_builder_shard.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import re, hashlib
+from .ecmblib.src.ecmblib import ecmbUtils
+
+
+class ecmbBuilderShard():
+
+    _shard_nr = None
+    _shard_cnt = None
+
+    def __init__(self, shard: str):
+        # "i/n", the shards are numbered from 1 to n
+        match = re.search(r'^\s*([0-9]+)\s*/\s*([0-9]+)\s*$', str(shard))
+        if not match:
+            ecmbUtils.raise_exception(f'shard "{shard}" has to be in the format i/n, eg. 1/4!')
+
+        self._shard_nr = int(match.group(1))
+        self._shard_cnt = int(match.group(2))
+        ecmbUtils.validate_int(True, 'shard count', self._shard_cnt, 1)
+        ecmbUtils.validate_int(True, 'shard number', self._shard_nr, 1, self._shard_cnt)
+
+
+    def get_shard_nr(self):
+        return self._shard_nr
+    shard_nr: int = property(get_shard_nr)
+
+    def get_shard_cnt(self):
+        return self._shard_cnt
+    shard_cnt: int = property(get_shard_cnt)
+
+
+    def contains(self, folder_name: str, volume_nr: int = None) -> bool:
+        # a stable hash, so every node gets the same result without talking to the others
+        key = folder_name + '|' + (str(volume_nr) if volume_nr != None else '')
+        key_hash = int(hashlib.sha256(key.encode()).hexdigest()[0:16], 16)
+        return key_hash % self._shard_cnt == self._shard_nr - 1
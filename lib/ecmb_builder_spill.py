@@ -0,0 +1,76 @@
+"""
+ File: ecmb_builder_spill.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, io, shutil, tempfile
+
+
+class ecmbBuilderSpill():
+
+    _memory_budget = None
+    _memory_used = None
+    _spill_dir = None
+    _spill_cnt = None
+
+    def __init__(self, memory_budget: int):
+        self._memory_budget = memory_budget * 1024 * 1024
+        self._memory_used = 0
+        self._spill_cnt = 0
+
+
+    def get_memory_used(self):
+        return self._memory_used
+    memory_used: int = property(get_memory_used)
+
+
+    def store(self, image: list[str|io.BytesIO]) -> list[str|io.BytesIO]:
+        # pages are kept in memory until the budget is used up, the rest is written to a spill-file and added by path
+        size = sum([part.getbuffer().nbytes for part in image if type(part) != str])
+        if size == 0 or self._memory_used + size <= self._memory_budget:
+            self._memory_used += size
+            return image
+
+        if not self._spill_dir:
+            self._spill_dir = tempfile.mkdtemp(prefix='ecmb_builder_spill_')
+
+        result = []
+        for part in image:
+            if type(part) == str:
+                result.append(part)
+                continue
+            self._spill_cnt += 1
+            file_name = os.path.join(self._spill_dir, str(self._spill_cnt) + '.webp')
+            with open(file_name, 'wb') as f:
+                f.write(part.getbuffer())
+            part.close()
+            result.append(file_name)
+        return result
+
+
+    def cleanup(self) -> None:
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        self._memory_used = 0
+        self._spill_cnt = 0
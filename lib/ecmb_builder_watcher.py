@@ -0,0 +1,140 @@
+"""
+ File: ecmb_builder_watcher.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, threading
+from time import perf_counter, sleep
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class ecmbBuilderWatcher():
+
+    _watch_dir = None
+    _debounce = None
+    _poll_interval = None
+
+    _lock = None
+    _changes = None
+    _last_event = None
+    _observer = None
+    _snapshot = None
+
+    def __init__(self, watch_dir: str, debounce: float = 2, poll_interval: float = 1):
+        self._watch_dir = watch_dir
+        self._debounce = float(debounce)
+        self._poll_interval = float(poll_interval)
+        self._lock = threading.Lock()
+        self._changes = set()
+        self._last_event = 0
+
+
+    def get_watch_method(self):
+        # watchdog uses inotify on linux and ReadDirectoryChangesW on windows
+        return 'watchdog' if Observer != None else 'polling'
+    watch_method: str = property(get_watch_method)
+
+
+    def start(self) -> None:
+        if Observer != None:
+            self._observer = Observer()
+            self._observer.schedule(_ecmbBuilderWatchHandler(self), self._watch_dir, recursive=True)
+            self._observer.start()
+        else:
+            self._snapshot = self._take_snapshot()
+
+
+    def stop(self) -> None:
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+
+    def wait_for_changes(self) -> set[str]:
+        # blocks until there are changes and no new event came in for the debounce-time, so a burst of files is one rebuild
+        while True:
+            if not self._observer:
+                self._poll()
+
+            with self._lock:
+                if len(self._changes) and perf_counter() - self._last_event >= self._debounce:
+                    changes = self._changes
+                    self._changes = set()
+                    return changes
+
+            sleep(self._poll_interval if not self._observer else 0.2)
+
+
+    def add_change(self, file_path: str) -> None:
+        with self._lock:
+            self._changes.add(file_path)
+            self._last_event = perf_counter()
+
+
+    def _poll(self) -> None:
+        snapshot = self._take_snapshot()
+        for file_path in snapshot.keys() | self._snapshot.keys():
+            if snapshot.get(file_path) != self._snapshot.get(file_path):
+                self.add_change(file_path)
+        self._snapshot = snapshot
+
+
+    def _take_snapshot(self, dir_path: str = None, snapshot: dict = None) -> dict:
+        dir_path = dir_path if dir_path else self._watch_dir
+        snapshot = snapshot if snapshot != None else {}
+        try:
+            for ele in os.scandir(dir_path):
+                if ele.is_dir(follow_symlinks=False):
+                    snapshot[ele.path] = None
+                    self._take_snapshot(ele.path, snapshot)
+                elif ele.is_file(follow_symlinks=False):
+                    stat = ele.stat()
+                    snapshot[ele.path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            pass
+        return snapshot
+
+
+
+class _ecmbBuilderWatchHandler(FileSystemEventHandler):
+
+    _watcher = None
+
+    def __init__(self, watcher: ecmbBuilderWatcher):
+        super().__init__()
+        self._watcher = watcher
+
+
+    def on_any_event(self, event) -> None:
+        if event.event_type in ['opened', 'closed_no_write']:
+            return
+        self._watcher.add_change(event.src_path)
+        if getattr(event, 'dest_path', None):
+            self._watcher.add_change(event.dest_path)
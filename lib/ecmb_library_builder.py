@@ -0,0 +1,151 @@
+"""
+ File: ecmb_library_builder.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, json
+from tqdm import tqdm
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ecmb_builder_enums import *
+from .ecmb_builder_utils import ecmbBuilderUtils
+from .ecmb_builder_config import ecmbBuilderConfig
+from .ecmb_builder_executor import ecmbBuilderExecutor
+from .ecmb_builder_cache import ecmbBuilderCache
+from .ecmb_builder_shard import ecmbBuilderShard
+from .ecmb_builder import ecmbBuilder
+from .ecmblib.src.ecmblib import ecmbUtils, ecmbException
+
+
+class ecmbLibraryBuilder():
+
+    _builder_config = None
+
+    def __init__(self):
+        # the config is loaded once and shared by all series
+        self._builder_config = ecmbBuilderConfig()
+
+
+    def build(self, workers: int = 0, executor_type: EXECUTOR_TYPE = EXECUTOR_TYPE.PROCESS, parallel_books: int = 2, force: bool = False, shard: str = None) -> None:
+        parallel_books = int(parallel_books) if str(parallel_books).isnumeric() else parallel_books
+        ecmbUtils.validate_int(True, 'parallel_books', parallel_books, 1, 64)
+        shard = ecmbBuilderShard(shard) if shard else None
+
+        results = {}
+        job_list = []
+        for folder_name in self._find_series():
+            results[folder_name] = []
+            try:
+                builder = ecmbBuilder(folder_name, self._builder_config)
+                for volume_nr in builder.get_volume_nr_list(None, shard):
+                    job_list.append((folder_name, volume_nr, builder.get_page_count(volume_nr)))
+            except ecmbException as e:
+                results[folder_name].append({'file_name': folder_name, 'error': str(e), 'skipped': False, 'meta_data_only': False, 'stats': None})
+
+        # the biggest books are started first, so the small ones are filling up the pool at the end
+        job_list.sort(key=lambda job: job[2], reverse=True)
+
+        print(f'  {len(results)} series, {len(job_list)} books, {sum([job[2] for job in job_list])} pages', flush=True)
+
+        # all books are sharing one worker-pool, every idle worker takes the next page of any running book
+        with ecmbBuilderExecutor(workers, executor_type) as executor:
+            with ThreadPoolExecutor(max_workers=parallel_books) as pool:
+                future_list = {pool.submit(self._build_job, executor, folder_name, volume_nr, force): (folder_name, page_count) for folder_name, volume_nr, page_count in job_list}
+                with tqdm(total=sum([job[2] for job in job_list]), desc='  build-all', unit='pages') as progress:
+                    for future in as_completed(future_list):
+                        folder_name, page_count = future_list[future]
+                        results[folder_name].append(future.result())
+                        progress.update(page_count)
+
+        if self._builder_config.cache_dir:
+            ecmbBuilderCache(self._builder_config.cache_dir, self._builder_config.cache_max_size).cleanup()
+
+        self._print_summary(results)
+
+
+    def _find_series(self) -> list[str]:
+        source_dir = self._builder_config.source_dir
+        if not os.path.isdir(source_dir):
+            ecmbUtils.raise_exception(f'source_dir "{source_dir}" was not found!')
+
+        # only the folders directly in the source_dir, a series is built by its folder-name
+        series_list = []
+        for folder in ecmbBuilderUtils.list_dirs(source_dir, r'^(?!__).+$', 0):
+            if os.path.exists(folder['path'] + folder['name'] + '\\book_config.json'):
+                series_list.append(folder['name'])
+        return series_list
+
+
+    def _build_job(self, executor: ecmbBuilderExecutor, folder_name: str, volume_nr: int, force: bool) -> dict:
+        # every book gets its own builder, they only share the config and the executor
+        builder = ecmbBuilder(folder_name, self._builder_config)
+        builder._show_progress = False
+        try:
+            return builder.build_volume(builder._load_resize_method(), executor, volume_nr, force)
+        except Exception as e:
+            return builder._get_error_result(volume_nr, e)
+
+
+    def _print_summary(self, results: dict) -> None:
+        summary = {'date': datetime.now().isoformat(timespec='seconds'), 'built': 0, 'skipped': 0, 'failed': 0, 'series': {}}
+
+        print('', flush=True)
+        for folder_name in sorted(results.keys()):
+            book_list = sorted(results[folder_name], key=lambda result: result['file_name'])
+            failed = [result for result in book_list if result['error']]
+            skipped = [result for result in book_list if not result['error'] and result['skipped']]
+            locked = [result for result in skipped if result.get('locked')]
+            built = [result for result in book_list if not result['error'] and not result['skipped']]
+
+            summary['built'] += len(built)
+            summary['skipped'] += len(skipped)
+            summary['failed'] += len(failed)
+            summary['series'][folder_name] = {
+                'built': [result['file_name'] for result in built],
+                'skipped': [result['file_name'] for result in skipped if not result.get('locked')],
+                'locked': [result['file_name'] for result in locked],
+                'failed': {result['file_name']: result['error'] for result in failed}
+            }
+
+            msg = f'{folder_name}: {len(built)} built, {len(skipped)} skipped, {len(failed)} failed'
+            msg += f' ({len(locked)} locked by another build)' if len(locked) else ''
+            if len(failed):
+                print('\x1b[31;20m  FAILED:  ' + msg + '\x1b[0m', flush=True)
+                for result in failed:
+                    print('\x1b[31;20m' + '\n'.join(['      ' + p for p in result['error'].split('\n')]) + '\x1b[0m', flush=True)
+            elif len(built):
+                print('\033[1;32;40m  OK:      ' + msg + '\x1b[0m', flush=True)
+            else:
+                print('  SKIPPED: ' + msg, flush=True)
+
+        summary_file = self._builder_config.output_dir + '__ecmb_report\\library_summary.json'
+        os.makedirs(os.path.dirname(summary_file), exist_ok=True)
+        with open(summary_file, 'w') as f:
+            json.dump(summary, f, indent=1)
+
+        print('', flush=True)
+        print(f'  {summary["built"]} built, {summary["skipped"]} skipped, {summary["failed"]} failed, summary: "{summary_file}"', flush=True)
+        print('', flush=True)
+
+        if summary['failed']:
+            raise ecmbException(f'{summary["failed"]} books failed!')
@@ -27,7 +27,7 @@ import re, os, path, hashlib
 from datetime import datetime
 from.ecmb_builder_enums import *
 from .ecmb_builder_base import ecmbBuilderBase
-from .ecmblib.src.ecmblib import ecmbException, ecmbUtils
+from .ecmb_builder_ecmblib import ecmbException, ecmbUtils
 
 
 class ecmbRenamer(ecmbBuilderBase):
@@ -83,6 +83,7 @@ class ecmbRenamer(ecmbBuilderBase):
             volume_nr += 1
             volume_dir = self._source_dir + 'ecmbbuilder_tmpname_' + hashlib.md5(str(datetime.now()).encode()).hexdigest() + ('_{}'.format(str(volume_nr).zfill(3)))
             os.mkdir(volume_dir)
+            self._get_index().add_dir(volume_dir)
 
             found = False
             page_count = 0
@@ -96,10 +97,12 @@ class ecmbRenamer(ecmbBuilderBase):
                 found = True
                 page_count += chapter['images']
                 os.rename(chapter['path'] + chapter['name'], volume_dir + '\\' + chapter['name'])
+                self._get_index().move(chapter['path'] + chapter['name'], volume_dir + '\\' + chapter['name'])
                 chapter_folders.remove(chapter)
 
             if not found:
                 os.remove(volume_dir)
+                self._get_index().remove_dir(volume_dir)
         
         (chapter_folders, volume_folders) = self._read_folder_structure()
         if volume_folders:
@@ -187,6 +190,7 @@ class ecmbRenamer(ecmbBuilderBase):
                 new_name = item['name'] + tmp_name + (str(cnt).zfill(zfill))
                 new_name += '.' + item.get('extension') if item.get('extension') else ''
                 os.rename(item['path'] + item['name'], item['path'] + new_name)
+                self._get_index().move(item['path'] + item['name'], item['path'] + new_name)
                 item['tmp_name'] = new_name
 
             cnt = start_at
@@ -203,7 +207,10 @@ class ecmbRenamer(ecmbBuilderBase):
 
                 new_name += '.' + item.get('extension') if item.get('extension') else ''
                 os.rename(item['path'] + item['tmp_name'], item['path'] + new_name)
+                self._get_index().move(item['path'] + item['tmp_name'], item['path'] + new_name)
         except PermissionError:
+            # the folders are read again after the renaming was undone
+            self._reset_index()
             try:
                 for item in path_list:
                     if item.get('tmp_name'):
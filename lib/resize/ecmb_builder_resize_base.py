@@ -23,66 +23,469 @@
  SOFTWARE.
 """
 
-import io
-from PIL import Image
+import io, os, copy, threading
+import numpy
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
+from ..ecmb_builder_enums import *
+from ..ecmb_builder_page_store import ecmbBuilderPageStore
+from ..ecmb_builder_dedupe import ecmbBuilderDedupe
+from ..backend.ecmb_builder_backend_base import ecmbBuilderBackendBase
+from ..backend.ecmb_builder_backend_pillow import ecmbBuilderBackendPillow
+from ..ecmblib.src.ecmblib import ecmbUtils
+
+
+# the stats and the facts of the page which is processed by the current thread
+_page_stats = threading.local()
+
+# the webp-encoder releases the GIL, so the double-page and its halves are encoded at the same time
+_encode_pool = None
+_encode_pool_pid = None
+_encode_pool_lock = threading.Lock()
 
 
 class ecmbBuilderResizeBase(ABC):
 
+    # these webp-files can be added to the book as they are
+    _passthrough_modes = ['RGB', 'RGBA', 'L']
+
+    # resample-filter, min. size of the jpeg-draft as a multiple of the resize-size (None = no draft), reducing_gap of resize()
+    _resize_profiles = {
+        RESIZE_PROFILE.QUALITY.value: ('lanczos', None, None),
+        RESIZE_PROFILE.BALANCED.value: ('bicubic', 2, 3.0),
+        RESIZE_PROFILE.FAST.value: ('bilinear', 1, 2.0)
+    }
+
+    # webp-method and the effort for lossless images of the encoder-profiles, balanced has the method the builder always used
+    _webp_profiles = {
+        WEBP_PROFILE.FAST.value: (1, 25),
+        WEBP_PROFILE.BALANCED.value: (5, 50),
+        WEBP_PROFILE.MAX.value: (6, 100)
+    }
+
+    # a pixel is coloured if its channels differ more than this, a page is coloured if more than this share of pixels is coloured
+    _colour_tolerance = 16
+    _colour_share = 0.002
+
+    # the area of the parts of a double-page in single pages
+    _spread_units = {
+        SPREAD_MODE.FULL.value: 4,
+        SPREAD_MODE.DOWNSCALE.value: 2.5,
+        SPREAD_MODE.SPLIT.value: 2
+    }
+
     _target_width = None
     _target_height = None
     _webp_compression = None
     _compress_all = None
+    _resize_profile = None
+    _spread_mode = None
+    _resample_filter = None
+    _draft_factor = None
+    _reducing_gap = None
+    _webp_profile = None
+    _webp_method = None
+    _lossless_effort = None
+    _lineart_lossless = None
+    _page_budget = None
+    _page_store = None
+    _backend = None
 
-    def __init__(self, target_width: int, target_height: int, webp_compression: int, compress_all: bool) -> None:
+    def __init__(self, target_width: int, target_height: int, webp_compression: int, compress_all: bool, resize_profile: RESIZE_PROFILE = RESIZE_PROFILE.BALANCED, spread_mode: SPREAD_MODE = SPREAD_MODE.FULL, webp_profile: WEBP_PROFILE = WEBP_PROFILE.BALANCED, lineart_lossless: bool = False, backend: ecmbBuilderBackendBase = None) -> None:
         self._target_width = target_width
         self._target_height = target_height
         self._webp_compression = webp_compression
         self._compress_all = compress_all
 
+        self._resize_profile = ecmbUtils.enum_value(resize_profile)
+        ecmbUtils.validate_enum(True, 'resize_profile', self._resize_profile, RESIZE_PROFILE)
+        self._resample_filter, self._draft_factor, self._reducing_gap = self._resize_profiles[self._resize_profile]
 
-    def process(self, fp_full: str|io.BytesIO) -> list[str|io.BytesIO]:
-        pillow_full = Image.open(fp_full)
-        width, height = pillow_full.size
+        self._spread_mode = ecmbUtils.enum_value(spread_mode)
+        ecmbUtils.validate_enum(True, 'spread_mode', self._spread_mode, SPREAD_MODE)
 
-        if (width / height) > (self._target_width / self._target_height * 1.5):
-            pillow_full, resized = self._resize(pillow_full, self._target_width * 2, self._target_height)
-        else:
-            pillow_full, resized = self._resize(pillow_full, self._target_width, self._target_height)
+        self._webp_profile = ecmbUtils.enum_value(webp_profile)
+        ecmbUtils.validate_enum(True, 'webp_profile', self._webp_profile, WEBP_PROFILE)
+        self._webp_method, self._lossless_effort = self._webp_profiles[self._webp_profile]
+        self._lineart_lossless = lineart_lossless
+        self._backend = backend if backend != None else ecmbBuilderBackendPillow()
 
-        if resized or self._compress_all:
-            fp_full = io.BytesIO()
-            pillow_full.save(fp_full, 'webp', quality = self._webp_compression, method=5)
 
-        return self._split_image(fp_full, pillow_full)
-    
+    def get_backend(self):
+        return self._backend
+    backend: ecmbBuilderBackendBase = property(get_backend)
+
+
+    def get_page_store(self):
+        return self._page_store
+    page_store: ecmbBuilderPageStore = property(get_page_store)
+
+    def set_page_store(self, page_store: ecmbBuilderPageStore) -> None:
+        self._page_store = page_store
+
+
+    def get_page_budget(self):
+        return self._page_budget
+    page_budget: int = property(get_page_budget)
+
+    def with_page_budget(self, page_budget: int) -> 'ecmbBuilderResizeBase':
+        # a copy for one volume, the bytes of a single page, parts of double-pages get a budget by their area
+        resize_method = copy.copy(self)
+        resize_method._page_budget = page_budget
+        return resize_method
+
+
+    def get_cache_key(self) -> str:
+        # every setting which changes the output of process() has to be part of the key
+        return '|'.join([
+            type(self).__name__, str(self._target_width), str(self._target_height), str(self._webp_compression), str(self._compress_all), self._resize_profile, self._spread_mode,
+            self._webp_profile, str(self._webp_method), str(self._lossless_effort), str(self._lineart_lossless), str(self._page_budget), self._backend.name,
+            # v1: icc-profiles are converted to sRGB before encoding
+            'normalize_v1'
+        ])
+
+
+    def get_page_units(self, width: int, height: int) -> float:
+        # the size of the output of a page in single pages
+        return self._spread_units[self._spread_mode] if self.is_double_page(width, height) else 1
+
+
+    def is_double_page(self, width: int, height: int) -> bool:
+        return (width / height) > (self._target_width / self._target_height * 1.5)
+
+
+    def process(self, fp_full: str|io.BytesIO, stats: dict = None) -> list[str|io.BytesIO]:
+        _page_stats.stats = stats
+        self._set_stat('bytes_in', self._get_file_size(fp_full))
+
+        # the header-facts are taken from the page-store if possible, so the file isn't even opened for a passthrough
+        start = perf_counter()
+        image_full = None
+        page = self._page_store.get_page(fp_full) if self._page_store != None and type(fp_full) == str else None
+        if page == None:
+            image_full = self._backend.open(fp_full)
+            page = self._backend.probe(image_full)
+        _page_stats.page = page
+        width, height = page['width'], page['height']
+        self._set_stat('pixels_in', width * height)
 
+        # the resize-size is planned from the header, so big jpegs can be downscaled while decoding
+        double_page = self.is_double_page(width, height)
+        final_width = self._target_width * 2 if double_page else self._target_width
 
-    def _split_image(self, fp_full: str|io.BytesIO, pillow_full: Image) -> list[str|io.BytesIO]:
-        width, height = pillow_full.size
-        
-        if (width / height) < (self._target_width / self._target_height * 1.5):
-            if type(fp_full) == str:
-                pillow_full.close()
+        # a webp which already fits is never re-encoded, even with compress_all, only if it's bigger than the budget
+        passthrough = self._is_passthrough(page, final_width, self._target_height) and self._fits_budget(self._get_file_size(fp_full), width, height)
+        self._set_stat('passthrough', passthrough)
+        if passthrough and not double_page:
+            if image_full != None:
+                self._backend.close(image_full)
+            self._add_stage_time('decode', start)
+            self._set_stat('pixels_out', width * height)
+            self._set_stat('bytes_out', self._get_stat('bytes_in'))
             return [fp_full]
-            
-        pillow_left = pillow_full.crop((0, 0, round(width/2), height))
-        fp_left = io.BytesIO()
-        pillow_left.save(fp_left, 'webp', quality = self._webp_compression, method=5)
-        del pillow_left
-        
-        pillow_right = pillow_full.crop((round(width/2), 0, width, height))
-        fp_right = io.BytesIO()
-        pillow_right.save(fp_right, 'webp', quality = self._webp_compression, method=5)
-        del pillow_right
-        
+
+        if image_full == None:
+            image_full = self._backend.open(fp_full)
+        image_full, drafted = self._draft(image_full, final_width, self._target_height)
+        if self._compress_all or drafted:
+            # without compress_all the image is only decoded if it's needed, then decoding is part of the resize-stage
+            image_full = self._backend.load(image_full)
+        self._add_stage_time('decode', start)
+
+        prepared = self._compress_all or drafted or double_page or not self._fits_target(width, height, final_width, self._target_height)
+        if prepared:
+            image_full = self._prepare_encode(image_full)
+
+        start = perf_counter()
+        crop_time = self._get_stage_time('crop_detection')
+        image_full, resized = self._resize(image_full, final_width, self._target_height)
+        self._add_stage_time('resize', start, self._get_stage_time('crop_detection') - crop_time)
+        size = self._backend.get_size(image_full)
+        self._set_stat('pixels_out', size[0] * size[1])
+
+        # an unchanged image is passed through as it is, if it fits into the budget
+        fp_source = fp_full if passthrough or (not (resized or drafted or self._compress_all) and self._fits_budget(self._get_file_size(fp_full), size[0], size[1])) else None
+        if fp_source == None and not prepared:
+            image_full = self._prepare_encode(image_full)
+
+        if double_page or fp_source == None:
+            # the page is encoded anyway, so the hash for the near-duplicates is taken from the resized image
+            start = perf_counter()
+            image_full = self._detect_dhash(image_full)
+            self._add_stage_time('dhash', start)
+
+        if double_page:
+            start = perf_counter()
+            image = self._split_image(image_full, fp_source)
+            self._add_stage_time('split', start)
+        elif fp_source == None:
+            start = perf_counter()
+            image = [self._encode(image_full)]
+            self._add_stage_time('encode', start)
+        else:
+            image = [fp_source]
+
         if type(fp_full) == str:
-            pillow_full.close()
+            self._backend.close(image_full)
+        self._set_stat('bytes_out', sum([self._get_file_size(part) for part in image]))
+
+        return image
+    
+
+    def _prepare_encode(self, image: object) -> object:
+        # the image is encoded, so it doesn't need more than sRGB with 8 bit and no meta-data
+        start = perf_counter()
+        savings_time = self._get_stage_time('normalize_savings')
+        image = self._normalize(image)
+        self._add_stage_time('normalize', start, self._get_stage_time('normalize_savings') - savings_time)
+
+        # gray pages are resized and encoded with one channel instead of three
+        start = perf_counter()
+        image = self._convert_grayscale(image)
+        self._add_stage_time('grayscale', start)
+        return image
+
+
+    def _split_image(self, image_full: object, fp_source: str|io.BytesIO = None) -> list[str|io.BytesIO]:
+        # the halves are cropped from the same decoded image, then all parts are encoded in parallel
+        image_full = self._backend.materialize(image_full)
+        width, height = self._backend.get_size(image_full)
+        image_left = self._backend.crop(image_full, (0, 0, round(width/2), height))
+        image_right = self._backend.crop(image_full, (round(width/2), 0, width, height))
+
+        if self._spread_mode == SPREAD_MODE.SPLIT.value:
+            return self._encode_parallel([image_left, image_right])
+
+        if self._spread_mode == SPREAD_MODE.DOWNSCALE.value:
+            # the double-page is only shown as a whole, so it doesn't need more pixels than a single page
+            scale = min(self._target_width / width, self._target_height / height)
+            if scale < 1:
+                image_full = self._resample(image_full, (max(1, round(width * scale)), max(1, round(height * scale))))
+                fp_source = None
+
+        if fp_source != None:
+            return [fp_source] + self._encode_parallel([image_left, image_right])
+        return self._encode_parallel([image_full, image_left, image_right])
+
+
+    def _normalize(self, image: object) -> object:
+        image_normalized, steps = self._backend.normalize(image)
+        self._set_stat('normalized', steps)
+        if image_normalized is not image:
+            self._measure_normalize(image, image_normalized)
+            self._backend.close(image)
+        return image_normalized
+
+
+    def _measure_normalize(self, image: object, image_normalized: object) -> None:
+        # the page is encoded once with and once without the normalization, with the quality and method of the page
+        # both are downscaled to the resize-size first, so the encoder gets about as many pixels as for the page itself
+        start = perf_counter()
+        width, height = self._backend.get_size(image)
+        final_width = self._target_width * 2 if self.is_double_page(width, height) else self._target_width
+        scale = min(1, final_width / width, self._target_height / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        result = []
+        for image_tmp in [image, image_normalized]:
+            image_tmp = self._backend.materialize(image_tmp)
+            if scale < 1:
+                image_tmp = self._resample(image_tmp, size)
+            encode_start = perf_counter()
+            fp_image = self._backend.encode_webp(image_tmp, self._webp_compression, self._webp_method)
+            result.append((fp_image.getbuffer().nbytes, perf_counter() - encode_start))
+        self._set_stat('normalize_bytes_saved', result[0][0] - result[1][0])
+        self._set_stat('normalize_time_saved', result[0][1] - result[1][1])
+        self._add_stage_time('normalize_savings', start)
+
+
+    def _convert_grayscale(self, image: object) -> object:
+        grayscale = self._is_grayscale(image)
+        self._set_stat('grayscale', grayscale)
+        if not grayscale or self._backend.get_mode(image) == 'L' or self._backend.has_alpha(image):
+            return image
+
+        image_gray = self._backend.to_grayscale(image)
+        if image_gray is not image:
+            self._backend.close(image)
+        return image_gray
+
+
+    def _is_grayscale(self, image: object) -> bool:
+        if self._backend.get_mode(image) in ['1', 'L', 'LA', 'I', 'I;16', 'F']:
+            return True
+
+        page = self._get_page()
+        if page != None and page.get('grayscale') != None:
+            return page['grayscale']
+
+        # the thumbnail is averaged, so the chroma-noise of jpegs is mostly gone
+        pixels = self._backend.get_array(image, 256, 'RGB')
+        chroma = pixels.max(axis=2) - pixels.min(axis=2)
+        grayscale = bool((chroma > self._colour_tolerance).mean() <= self._colour_share)
+
+        self._set_page(grayscale=grayscale)
+        return grayscale
+
+
+    def _detect_dhash(self, image: object) -> object:
+        # only with a page-store, the hash is used by the builder after all pages were processed
+        page = self._get_page()
+        if self._page_store == None or page == None or page.get('dhash') != None:
+            return image
+
+        # the image is read again by the encoder, so it's kept in memory
+        image = self._backend.materialize(image)
+        self._set_page(dhash=ecmbBuilderDedupe.get_dhash(self._backend.get_array(image, 64, 'L')))
+        return image
+
+
+    def _is_passthrough(self, page: dict, final_width: int, final_height: int) -> bool:
+        # only the header is needed, the image isn't decoded
+        # exif, xmp and icc-profiles would be copied into the book, so a webp with meta-data is encoded without them
+        if page['format'] != 'WEBP' or page['mode'] not in self._passthrough_modes or page['animated'] or page['metadata']:
+            return False
+        return self._fits_target(page['width'], page['height'], final_width, final_height)
+
+
+    def _fits_target(self, width: int, height: int, final_width: int, final_height: int) -> bool:
+        # True if _resize() wouldn't change an image of this size
+        return False
+
+
+    def _get_budget(self, width: int, height: int) -> float:
+        # the bytes an image of this size may have, the budget is for a page of the resize-size
+        if self._page_budget == None:
+            return None
+        return self._page_budget * width * height / (self._target_width * self._target_height)
+
+
+    def _fits_budget(self, size: int, width: int, height: int) -> bool:
+        # a page which isn't encoded has to fit into the budget too, otherwise it's encoded with the budget
+        budget = self._get_budget(width, height)
+        return budget == None or size <= budget
+
+
+    def _encode(self, image: object) -> io.BytesIO:
+        # the image may be encoded more than once
+        image = self._backend.materialize(image)
+
+        size = self._backend.get_size(image)
+        budget = self._get_budget(size[0], size[1])
+
+        if self._lineart_lossless and self._is_lineart(image):
+            fp_image = self._backend.encode_webp(image, self._lossless_effort, self._webp_method, True)
+            if budget == None or fp_image.getbuffer().nbytes <= budget:
+                return fp_image
+
+        fp_image = self._backend.encode_webp(image, self._webp_compression, self._webp_method)
+        if budget == None or fp_image.getbuffer().nbytes <= budget:
+            return fp_image
+
+        # binary search for the highest quality which fits into the budget, if even 0 doesn't fit, 0 is used
+        low, high = 0, self._webp_compression - 1
+        fp_best = None
+        while low <= high:
+            quality = (low + high) // 2
+            fp_image = self._backend.encode_webp(image, quality, self._webp_method)
+            if fp_image.getbuffer().nbytes <= budget:
+                fp_best = fp_image
+                low = quality + 1
+            else:
+                high = quality - 1
+        return fp_best if fp_best != None else fp_image
+
+
+    def _is_lineart(self, image: object) -> bool:
+        # flat line-art has only a few colours, nearest-neighbour doesn't add new ones
+        pixels = self._backend.get_array(image, 256, 'RGB', True)
+        return len(numpy.unique(pixels.reshape(-1, pixels.shape[-1]), axis=0)) <= 32
+
+
+    def _encode_parallel(self, image_list: list[object]) -> list[io.BytesIO]:
+        # the calling worker encodes the first part itself, so it isn't only waiting for the pool
+        futures = [self._get_encode_pool().submit(self._encode, image) for image in image_list[1:]]
+        return [self._encode(image_list[0])] + [future.result() for future in futures]
+
+
+    @staticmethod
+    def _get_encode_pool() -> ThreadPoolExecutor:
+        global _encode_pool, _encode_pool_pid
+        # a forked worker-process can't use the threads of its parent
+        # the pool is shared by all page-workers, so it has a thread per cpu
+        with _encode_pool_lock:
+            if _encode_pool == None or _encode_pool_pid != os.getpid():
+                _encode_pool = ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 1), thread_name_prefix='ecmb_encode')
+                _encode_pool_pid = os.getpid()
+        return _encode_pool
+
+
+    def _draft(self, image: object, final_width: int, final_height: int) -> tuple[object, bool]:
+        # jpegs can be decoded with 1/2, 1/4 or 1/8 of their size, the draft is never smaller than the requested size
+        draft_size = self._get_draft_size(final_width, final_height)
+        if self._draft_factor == None or draft_size == None:
+            return (image, False)
+
+        size = self._backend.get_size(image)
+        image = self._backend.draft(image, (draft_size[0] * self._draft_factor, draft_size[1] * self._draft_factor))
+        return (image, self._backend.get_size(image) != size)
+
+
+    def _get_draft_size(self, final_width: int, final_height: int) -> tuple[int, int]:
+        # the smallest size the image can be decoded with, without losing anything for _resize()
+        return (final_width, final_height)
+
+
+    def _resample(self, image: object, size: tuple[int, int]) -> object:
+        return self._backend.resize(image, size, self._resample_filter, self._reducing_gap)
+
+
+    def _set_stat(self, name: str, value: int) -> None:
+        stats = getattr(_page_stats, 'stats', None)
+        if stats != None:
+            stats[name] = value
+
+
+    def _add_stage_time(self, stage: str, start: float, exclude: float = 0) -> None:
+        # the stages of a page can be timed by the resize-methods too, eg. crop_detection
+        stats = getattr(_page_stats, 'stats', None)
+        if stats != None:
+            duration = perf_counter() - start
+            stats.setdefault('stages', {})
+            stats['stages'][stage] = stats['stages'].get(stage, 0) + duration - exclude
+            stats.setdefault('spans', []).append((stage, start, duration))
+
+
+    def _get_file_size(self, fp_image: str|io.BytesIO) -> int:
+        return os.path.getsize(fp_image) if type(fp_image) == str else fp_image.getbuffer().nbytes
+
+
+    def _get_stat(self, name: str) -> int:
+        stats = getattr(_page_stats, 'stats', None)
+        if stats != None:
+            return stats.get(name)
+        return None
+
+
+    def _get_page(self) -> dict:
+        # the facts of the current page, with a path and the analysis-results if they are from the page-store
+        return getattr(_page_stats, 'page', None)
+
+
+    def _set_page(self, **values) -> None:
+        page = self._get_page()
+        if self._page_store != None and page != None and page.get('path'):
+            self._page_store.set_page(page['path'], **values)
+
 
-        return [fp_full, fp_left, fp_right]
+    def _get_stage_time(self, stage: str) -> float:
+        stats = getattr(_page_stats, 'stats', None)
+        if stats != None:
+            return stats.get('stages', {}).get(stage, 0)
+        return 0
     
 
     @abstractmethod
-    def _resize(self, pillow_full: Image, target_width: int, target_height: int) -> [io.BytesIO, Image]:
+    def _resize(self, image_full: object, target_width: int, target_height: int) -> [object, bool]:
         pass
\ No newline at end of file
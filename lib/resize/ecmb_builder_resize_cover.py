@@ -23,18 +23,17 @@
  SOFTWARE.
 """
 
-from PIL import Image
 from math import ceil
 from .ecmb_builder_resize_base import ecmbBuilderResizeBase
 
 class ecmbBuilderResizeCover(ecmbBuilderResizeBase):
 
 
-    def _resize(self, pillow_orig: Image, final_width: int, final_height: int) -> [Image, bool]:
-        orig_width, orig_height = pillow_orig.size
+    def _resize(self, image_orig: object, final_width: int, final_height: int) -> [object, bool]:
+        orig_width, orig_height = self._backend.get_size(image_orig)
 
         if orig_width == final_width and orig_height == final_height:
-            return (pillow_orig, False)
+            return (image_orig, False)
 
         offset_x = 0
         offset_y = 0
@@ -53,12 +52,16 @@ class ecmbBuilderResizeCover(ecmbBuilderResizeBase):
                 offset_x = ceil((target_width - final_width) / 2)
         
         if offset_x or offset_y:
-            pillow_tmp = pillow_orig.resize((target_width, target_height))
-            pillow_resized = pillow_tmp.crop((offset_x, offset_y, offset_x + final_width, offset_y + final_height))    
+            image_tmp = self._resample(image_orig, (target_width, target_height))
+            image_resized = self._backend.crop(image_tmp, (offset_x, offset_y, offset_x + final_width, offset_y + final_height))    
         else:
-            pillow_resized = pillow_orig.resize((final_width, final_height))
+            image_resized = self._resample(image_orig, (final_width, final_height))
         
-        pillow_orig.close()
-        del pillow_orig
+        self._backend.close(image_orig)
+        del image_orig
         
-        return (pillow_resized, True)
\ No newline at end of file
+        return (image_resized, True)
+
+
+    def _fits_target(self, width: int, height: int, final_width: int, final_height: int) -> bool:
+        return width == final_width and height == final_height
\ No newline at end of file
@@ -23,31 +23,88 @@
  SOFTWARE.
 """
 
-from PIL import Image, ImageEnhance, ImageOps
-from math import ceil
+import numpy
+from time import perf_counter
+from math import ceil, floor
 from .ecmb_builder_resize_max import ecmbBuilderResizeMax
 
 class ecmbBuilderResizeCropmax(ecmbBuilderResizeMax):
 
+    # the borders are detected on a grayscale thumbnail of this width
+    _detection_width = 400
+    # a pixel is ink if it's darker than this, a row/column is content if it has more than this share of ink
+    _ink_threshold = 224
+    _ink_density = 0.005
 
-    def _resize(self, pillow_orig: Image, final_width: int, final_height: int) -> [Image, bool]:
-        orig_width, orig_height = pillow_orig.size
-        
-        pillow_tmp = ImageEnhance.Contrast(pillow_orig.convert('RGB')).enhance(5)
-        pillow_tmp = ImageOps.invert(pillow_tmp)
+
+    def get_cache_key(self) -> str:
+        # v2: border-detection with ink-density on both axes
+        return super().get_cache_key() + '|crop_v2'
+
+
+    def _resize(self, image_orig: object, final_width: int, final_height: int) -> [object, bool]:
+        orig_width, orig_height = self._backend.get_size(image_orig)
         
-        box = pillow_tmp.getbbox()
-        box_width = box[2] - box[0]
+        start = perf_counter()
+        box = self._get_crop_box(image_orig)
+        self._add_stage_time('crop_detection', start)
 
-        if not (box_width < orig_width * 0.99 and box_width > orig_width * 0.85):
-            return super()._resize(pillow_orig, final_width, final_height)
+        # a border is only cut if it's a small part of the page, otherwise it's most likely part of the image
+        crop_x = box != None and (box[2] - box[0]) < orig_width * 0.99 and (box[2] - box[0]) > orig_width * 0.85
+        crop_y = box != None and (box[3] - box[1]) < orig_height * 0.99 and (box[3] - box[1]) > orig_height * 0.85
+        if not crop_x and not crop_y:
+            return super()._resize(image_orig, final_width, final_height)
 
-        pillow_resized = pillow_orig.crop((box[0], 0, box[2], orig_height))
+        image_resized = self._backend.crop(image_orig, (box[0] if crop_x else 0, box[1] if crop_y else 0, box[2] if crop_x else orig_width, box[3] if crop_y else orig_height))
         
-        pillow_orig.close()
-        del pillow_orig
+        self._backend.close(image_orig)
+        del image_orig
 
         if orig_width <= final_width and orig_height <= final_height:
-            return (pillow_resized, True)
+            return (image_resized, True)
+        else:
+            return super()._resize(image_resized, final_width, final_height)
+
+
+    def _get_crop_box(self, image_orig: object) -> list[int]:
+        # the box is kept in the page-store in the size of the source, because the image can be drafted
+        width, height = self._backend.get_size(image_orig)
+        page = self._get_page()
+        scale_x = width / page['width'] if page else 1
+        scale_y = height / page['height'] if page else 1
+
+        if page != None and page.get('crop_box') != None:
+            box = page['crop_box']
         else:
-            return super()._resize(pillow_resized, final_width, final_height)
\ No newline at end of file
+            box = self._detect_crop_box(image_orig)
+            box = [round(box[0] / scale_x), round(box[1] / scale_y), round(box[2] / scale_x), round(box[3] / scale_y)] if box else []
+            self._set_page(crop_box=box)
+
+        if not box:
+            return None
+        return [round(box[0] * scale_x), round(box[1] * scale_y), round(box[2] * scale_x), round(box[3] * scale_y)]
+
+
+    def _detect_crop_box(self, image_orig: object) -> list[int]:
+        # rows and columns with only a few dark pixels (scan-dust, dots) don't count as content
+        width, height = self._backend.get_size(image_orig)
+        ink = self._backend.get_array(image_orig, self._detection_width, 'L') < self._ink_threshold
+        rows = numpy.flatnonzero(ink.sum(axis=1) > max(1, ink.shape[1] * self._ink_density))
+        columns = numpy.flatnonzero(ink.sum(axis=0) > max(1, ink.shape[0] * self._ink_density))
+        if len(rows) == 0 or len(columns) == 0:
+            return None
+
+        # the box is mapped back to the size of the image, rounded outwards
+        scale_x = width / ink.shape[1]
+        scale_y = height / ink.shape[0]
+        return [
+            max(0, floor(columns[0] * scale_x)),
+            max(0, floor(rows[0] * scale_y)),
+            min(width, ceil((columns[-1] + 1) * scale_x)),
+            min(height, ceil((rows[-1] + 1) * scale_y))
+        ]
+
+
+    def _fits_target(self, width: int, height: int, final_width: int, final_height: int) -> bool:
+        # the borders can only be detected in the decoded image
+        return False
\ No newline at end of file
@@ -23,12 +23,20 @@
  SOFTWARE.
 """
 
-from PIL import Image
 from .ecmb_builder_resize_base import ecmbBuilderResizeBase
 
 class ecmbBuilderResizeNone(ecmbBuilderResizeBase):
 
 
-    def _resize(self, pillow_orig: Image, final_width: int, final_height: int) -> [Image, bool]:
-        return (pillow_orig, False)
+    def _resize(self, image_orig: object, final_width: int, final_height: int) -> [object, bool]:
+        return (image_orig, False)
+
+
+    def _fits_target(self, width: int, height: int, final_width: int, final_height: int) -> bool:
+        return True
+
+
+    def _get_draft_size(self, final_width: int, final_height: int) -> tuple[int, int]:
+        # the image keeps its original size
+        return None
 
@@ -23,21 +23,24 @@
  SOFTWARE.
 """
 
-from PIL import Image
 from .ecmb_builder_resize_base import ecmbBuilderResizeBase
 
 class ecmbBuilderResizeStretch(ecmbBuilderResizeBase):
 
 
-    def _resize(self, pillow_orig: Image, final_width: int, final_height: int) -> [Image, bool]:
-        orig_width, orig_height = pillow_orig.size
+    def _resize(self, image_orig: object, final_width: int, final_height: int) -> [object, bool]:
+        orig_width, orig_height = self._backend.get_size(image_orig)
 
         if orig_width == final_width and orig_height == final_height:
-            return (pillow_orig, False)
+            return (image_orig, False)
 
-        pillow_resized = pillow_orig.resize((final_width, final_height))
+        image_resized = self._resample(image_orig, (final_width, final_height))
         
-        pillow_orig.close()
-        del pillow_orig
+        self._backend.close(image_orig)
+        del image_orig
 
-        return (pillow_resized, True)
\ No newline at end of file
+        return (image_resized, True)
+
+
+    def _fits_target(self, width: int, height: int, final_width: int, final_height: int) -> bool:
+        return width == final_width and height == final_height
\ No newline at end of file
@@ -25,9 +25,8 @@
 
 from invoke import task
 from lib.ecmb_builder_enums import *
-from lib.ecmb_renamer import ecmbRenamer
-from lib.ecmb_builder import ecmbBuilder
-from lib.ecmblib.src.ecmblib import ecmbException
+
+# the tasks import only the modules they need, so eg. renaming doesn't load the imaging-libraries
 
 
 
@@ -49,6 +48,8 @@ def rename(ctx, rename_items: RENAME_ITEMS, folder_name):
 
 
 def renameservice(ctx, rename_type: RENAME_TYPE, rename_items: RENAME_ITEMS, folder_name: str):
+	from lib.ecmb_renamer import ecmbRenamer
+	from lib.ecmb_builder_ecmblib import ecmbException
 	print(' ', flush=True)
 	try:
 		renamer = ecmbRenamer(folder_name)
@@ -61,6 +62,8 @@ def renameservice(ctx, rename_type: RENAME_TYPE, rename_items: RENAME_ITEMS, fol
 
 @task()
 def splitvolumes(ctx, volumes: int, folder_name: str):
+	from lib.ecmb_renamer import ecmbRenamer
+	from lib.ecmb_builder_ecmblib import ecmbException
 	print(' ', flush=True)
 	try:
 		renamer = ecmbRenamer(folder_name)
@@ -73,6 +76,8 @@ def splitvolumes(ctx, volumes: int, folder_name: str):
 
 @task()
 def init(ctx, init_type: INIT_TYPE, folder_name: str):
+	from lib.ecmb_builder import ecmbBuilder
+	from lib.ecmb_builder_ecmblib import ecmbException
 	print(' ', flush=True)
 	try:
 		builder = ecmbBuilder(folder_name)
@@ -84,14 +89,77 @@ def init(ctx, init_type: INIT_TYPE, folder_name: str):
 	
 
 @task(optional=["volumes"])
-def build(ctx, folder_name: str, volumes: str = None):
+def build(ctx, folder_name: str, volumes: str = None, workers: int = 1, executor: EXECUTOR_TYPE = EXECUTOR_TYPE.THREAD.value, parallel_volumes: int = 1, force: bool = False, trace: bool = False, dry_run: bool = False, samples: int = 3, shard: str = None, resume: bool = False, backend: str = None):
+	from lib.ecmb_builder import ecmbBuilder
+	from lib.ecmb_builder_ecmblib import ecmbException
 	print(' ', flush=True)
 	try:
 		builder = ecmbBuilder(folder_name)
-		builder.build(volumes)
+		builder.build(volumes, workers, executor, parallel_volumes, force, trace, dry_run, samples, shard, resume, backend)
+		print('\033[1;32;40m  SUCCESS! \x1b[0m\n', flush=True)
+	except ecmbException as e:
+		msg = '\n'.join(['  ' + p for p in str(e).split('\n')])
+		print('\x1b[31;20m\n' + msg + '\n\n  FAILED!  \x1b[0m\n', flush=True)
+
+
+@task()
+def build_all(ctx, workers: int = 0, executor: EXECUTOR_TYPE = EXECUTOR_TYPE.PROCESS.value, parallel_books: int = 2, force: bool = False, shard: str = None):
+	from lib.ecmb_library_builder import ecmbLibraryBuilder
+	from lib.ecmb_builder_ecmblib import ecmbException
+	print(' ', flush=True)
+	try:
+		library_builder = ecmbLibraryBuilder()
+		library_builder.build(workers, executor, parallel_books, force, shard)
 		print('\033[1;32;40m  SUCCESS! \x1b[0m\n', flush=True)
 	except ecmbException as e:
 		msg = '\n'.join(['  ' + p for p in str(e).split('\n')])
 		print('\x1b[31;20m\n' + msg + '\n\n  FAILED!  \x1b[0m\n', flush=True)
+
+
+@task()
+def watch(ctx, folder_name: str, workers: int = 1, executor: EXECUTOR_TYPE = EXECUTOR_TYPE.THREAD.value, debounce: float = 2.0):
+	from lib.ecmb_builder import ecmbBuilder
+	from lib.ecmb_builder_ecmblib import ecmbException
+	print(' ', flush=True)
+	try:
+		builder = ecmbBuilder(folder_name)
+		builder.watch(workers, executor, debounce)
+		print('\033[1;32;40m  STOPPED! \x1b[0m\n', flush=True)
+	except ecmbException as e:
+		msg = '\n'.join(['  ' + p for p in str(e).split('\n')])
+		print('\x1b[31;20m\n' + msg + '\n\n  FAILED!  \x1b[0m\n', flush=True)
 	
 
+
+
+
+@task()
+def cache(ctx, cache_action: CACHE_ACTION):
+	from lib.ecmb_builder_config import ecmbBuilderConfig
+	from lib.ecmb_builder_cache import ecmbBuilderCache
+	from lib.ecmb_builder_ecmblib import ecmbException
+	print(' ', flush=True)
+	try:
+		builder_config = ecmbBuilderConfig()
+		if not builder_config.cache_dir:
+			raise ecmbException('The cache is disabled! Set "cache_dir" in "ecmb_builder_config.yml".')
+		cache = ecmbBuilderCache(builder_config.cache_dir, builder_config.cache_max_size)
+		cache.run_action(cache_action)
+		print('\033[1;32;40m  SUCCESS!\x1b[0m\n', flush=True)
+	except ecmbException as e:
+		msg = '\n'.join(['  ' + p for p in str(e).split('\n')])
+		print('\x1b[31;20m\n' + msg + '\n\n  FAILED!  \x1b[0m\n', flush=True)
+
+
+@task()
+def benchmark(ctx, pages: int = 64, workers: int = 0, executor: EXECUTOR_TYPE = EXECUTOR_TYPE.PROCESS.value, save: str = None, compare: str = None):
+	from lib.ecmb_benchmark import ecmbBenchmark
+	from lib.ecmb_builder_ecmblib import ecmbException
+	print(' ', flush=True)
+	try:
+		benchmark = ecmbBenchmark()
+		benchmark.run(pages, workers, executor, save, compare)
+		print('\033[1;32;40m  SUCCESS! \x1b[0m\n', flush=True)
+	except ecmbException as e:
+		msg = '\n'.join(['  ' + p for p in str(e).split('\n')])
+		print('\x1b[31;20m\n' + msg + '\n\n  FAILED!  \x1b[0m\n', flush=True)
@@ -0,0 +1,90 @@
+"""
+ File: test_backend_parity.py
+ Copyright (c) 2023 Clemens K. (https://github.com/metacreature)
+ 
+ MIT License
+ 
+ Permission is hereby granted, free of charge, to any person obtaining a copy
+ of this software and associated documentation files (the "Software"), to deal
+ in the Software without restriction, including without limitation the rights
+ to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ copies of the Software, and to permit persons to whom the Software is
+ furnished to do so, subject to the following conditions:
+ 
+ The above copyright notice and this permission notice shall be included in all
+ copies or substantial portions of the Software.
+ 
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+ SOFTWARE.
+"""
+
+import os, sys, io, shutil, tempfile, unittest
+import numpy
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.resize.ecmb_builder_resize_none import ecmbBuilderResizeNone
+from lib.resize.ecmb_builder_resize_max import ecmbBuilderResizeMax
+from lib.resize.ecmb_builder_resize_cropmax import ecmbBuilderResizeCropmax
+from lib.resize.ecmb_builder_resize_cover import ecmbBuilderResizeCover
+from lib.resize.ecmb_builder_resize_stretch import ecmbBuilderResizeStretch
+from lib.backend.ecmb_builder_backend_pillow import ecmbBuilderBackendPillow
+from lib.backend import ecmb_builder_backend_vips
+
+
+@unittest.skipIf(ecmb_builder_backend_vips.pyvips == None, 'pyvips and libvips are not installed')
+class ecmbBackendParityTest(unittest.TestCase):
+
+    # the resize-kernels of pillow and libvips aren't identical, so the pages may differ a little
+    # the mean difference of the channels is below 0.2 for downscaled and about 2 for upscaled pages
+    _max_difference = 4
+
+    # single-pages in gray and colour, a double-page and a page which is upscaled
+    _pages = [(1200, 1700, 'L'), (2600, 1700, 'L'), (1300, 1800, 'RGB'), (800, 1000, 'RGB')]
+
+    _work_dir = None
+    _page_list = None
+
+    def setUp(self):
+        self._work_dir = tempfile.mkdtemp(prefix='ecmb_builder_test_')
+        self._page_list = []
+        for page_nr, (width, height, mode) in enumerate(self._pages):
+            image = Image.new('RGB', (width, height), (255, 255, 255))
+            draw = ImageDraw.Draw(image)
+            for nr in range(40):
+                x, y = (nr * 97) % width, (nr * 131) % height
+                draw.rectangle((x, y, x + 120, y + 200), outline=(0, 0, 0), width=4, fill=(nr * 6 % 256, 80, 200))
+            page_path = os.path.join(self._work_dir, f'page_{page_nr}.jpg')
+            image.convert(mode).save(page_path, quality=92)
+            self._page_list.append(page_path)
+
+
+    def tearDown(self):
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+
+
+    def test_resize_methods(self):
+        for clas in [ecmbBuilderResizeNone, ecmbBuilderResizeMax, ecmbBuilderResizeCropmax, ecmbBuilderResizeCover, ecmbBuilderResizeStretch]:
+            output = {}
+            for backend in [ecmbBuilderBackendPillow(), ecmb_builder_backend_vips.ecmbBuilderBackendVips()]:
+                method = clas(900, 1200, 90, True, 'balanced', 'full', 'balanced', False, backend)
+                output[backend.name] = [self._decode(method.process(page_path)) for page_path in self._page_list]
+
+            for page_path, pillow_parts, vips_parts in zip(self._page_list, output['pillow'], output['vips']):
+                with self.subTest(resize_method=clas.__name__, page=os.path.basename(page_path)):
+                    self.assertEqual([part.shape for part in pillow_parts], [part.shape for part in vips_parts])
+                    for pillow_part, vips_part in zip(pillow_parts, vips_parts):
+                        self.assertLessEqual(float(numpy.abs(pillow_part - vips_part).mean()), self._max_difference)
+
+
+    def _decode(self, image: list[str|io.BytesIO]) -> list[numpy.ndarray]:
+        return [numpy.asarray(Image.open(part).convert('RGB'), dtype=numpy.int16) for part in image]
+
+
+if __name__ == '__main__':
+    unittest.main()